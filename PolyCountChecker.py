@@ -1,7 +1,13 @@
 from functools import partial
+import fnmatch
+import json
+import os
+
+import numpy as np
 
 import maya.cmds as cmds
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
 from PySide2 import QtGui, QtCore, QtWidgets
 from shiboken2 import wrapInstance
 import maya.app.renderSetup.model.renderSetup as renderSetup
@@ -56,7 +62,8 @@ class CustomMayaSlider(QtWidgets.QWidget):
             # x = QtWidgets.QLabel()
             # x.setFixedSize(10, 10)
 
-            cmds.intSliderGrp(self.get_full_name(), edit=True, changeCommand=partial(self.on_value_changed))
+            cmds.intSliderGrp(self.get_full_name(), edit=True, changeCommand=partial(self.on_value_changed),
+                              dragCommand=partial(self.on_value_changed))
         # Delete mel window
         cmds.deleteUI(window, window=True)
 
@@ -97,6 +104,11 @@ class RenderLayerHelpers:
         self.setColor(self.green_shader + ".outColor", [0.0, 1.0, 0.0])
         self.setColor(self.red_shader + ".outColor", [1.0, 0.0, 0.0])
 
+        # Shape -> original shading group memberships while the shaders are assigned directly
+        self.original_assignments = None
+        self.direct_nodes = None
+        self.save_callbacks = []
+
         self.create_vertex_layer()
 
     def createShader(self, shaderType):
@@ -134,10 +146,99 @@ class RenderLayerHelpers:
 
         invalid_pattern = " ".join(invalid_nodes)
         self.invalid_vertex_geos_collection.getSelector().setPattern(invalid_pattern)
+        self.restore_assignments()
         self.rs.switchToLayer(self.vertex_layer)
 
+    def set_direct_assignment(self, valid_nodes, invalid_nodes):
+        # Assigns the green and red shaders straight to the meshes, two sets calls instead of a layer switch
+        if self.rs.getVisibleRenderLayer() == self.vertex_layer:
+            self.rs.switchToLayer(self.rs.getDefaultRenderLayer())
+        self.snapshot_assignments()
+        self.direct_nodes = (list(valid_nodes), list(invalid_nodes))
+        self.apply_direct_assignment()
+
+        # The assignments are real scene edits, so a save puts the originals back first
+        if not self.save_callbacks:
+            self.save_callbacks = [
+                om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeSave, self.on_before_save),
+                om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterSave, self.on_after_save),
+            ]
+
+    def apply_direct_assignment(self):
+        valid_nodes, invalid_nodes = self.direct_nodes
+        cmds.undoInfo(openChunk=True, chunkName="PolyCountVisualisation")
+        try:
+            if valid_nodes:
+                cmds.sets(valid_nodes, e=True, forceElement=self.green_shading_grp)
+            if invalid_nodes:
+                cmds.sets(invalid_nodes, e=True, forceElement=self.red_shading_grp)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    def get_member_shapes(self, member):
+        # "pCube1", "pCubeShape1" and "pCube1.f[0:3]" all resolve to the long shape path
+        nodes = cmds.ls(member, objectsOnly=True, long=True) or []
+        return cmds.ls(nodes, dag=True, shapes=True, long=True) or []
+
+    def snapshot_assignments(self):
+        # Shape -> [(shading group, member)], retaken on every assignment. Shapes still showing green or red
+        # aren't in any other shading group, so they keep what was recorded before they were coloured,
+        # while anything the user reassigned in the meantime is recorded as it is now
+        assignments = {}
+        for shading_group in cmds.ls(type="shadingEngine"):
+            if shading_group in (self.green_shading_grp, self.red_shading_grp):
+                continue
+            for member in cmds.sets(shading_group, q=True) or []:
+                for shape in self.get_member_shapes(member):
+                    assignments.setdefault(shape, []).append((shading_group, member))
+
+        for shape, entries in (self.original_assignments or {}).items():
+            if shape not in assignments:
+                assignments[shape] = entries
+        self.original_assignments = assignments
+
+    def put_back_assignments(self):
+        members_by_group = {}
+        for entries in self.original_assignments.values():
+            for shading_group, member in entries:
+                members_by_group.setdefault(shading_group, set()).add(member)
+
+        cmds.undoInfo(openChunk=True, chunkName="PolyCountVisualisationRestore")
+        try:
+            for shading_group, members in members_by_group.items():
+                # Skips members and shading groups deleted since the snapshot
+                members = cmds.ls(list(members))
+                if members and cmds.objExists(shading_group):
+                    cmds.sets(members, e=True, forceElement=shading_group)
+
+            # Meshes made from coloured ones after the snapshot have nothing to go back to
+            leftovers = (cmds.sets(self.green_shading_grp, q=True) or []) + (cmds.sets(self.red_shading_grp, q=True) or [])
+            if leftovers:
+                cmds.sets(leftovers, e=True, forceElement="initialShadingGroup")
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    def restore_assignments(self):
+        if self.save_callbacks:
+            om2.MMessage.removeCallbacks(self.save_callbacks)
+            self.save_callbacks = []
+        if self.original_assignments is None:
+            return
+        self.put_back_assignments()
+        self.original_assignments = None
+        self.direct_nodes = None
+
+    def on_before_save(self, *args):
+        if self.original_assignments is not None:
+            self.put_back_assignments()
+
+    def on_after_save(self, *args):
+        if self.original_assignments is not None and self.direct_nodes:
+            self.apply_direct_assignment()
+
     def delete_visibility_layer(self):
         # print(self.vertex_layer)
+        self.restore_assignments()
         self.rs.switchToLayer(self.rs.getDefaultRenderLayer())
         self.rs.detachRenderLayer(self.vertex_layer)
         renderLayer.delete(self.vertex_layer)
@@ -170,7 +271,746 @@ class PolyCountHelpers:
     #     cmds.createRenderLayer("tris_poly_count")
 
 
-class TableWidget(QtWidgets.QTableWidget):
+class PolyCountShapeKeys:
+    # hashCode() isn't unique and is handed out again once a node is deleted,
+    # so it only picks a bucket and the handles in it are compared node by node
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._handles = {}
+        self._hash_codes = {}
+        self._buckets = {}
+        self._next_key = 0
+
+    def get_key(self, node, create=True):
+        handle = om2.MObjectHandle(node)
+        hash_code = handle.hashCode()
+        for key in self._buckets.get(hash_code, []):
+            existing = self._handles[key]
+            if existing.isValid() and existing.isAlive() and existing.object() == node:
+                return key
+        if not create:
+            return None
+
+        key = self._next_key
+        self._next_key += 1
+        self._handles[key] = handle
+        self._hash_codes[key] = hash_code
+        self._buckets.setdefault(hash_code, []).append(key)
+        return key
+
+    def get_handle(self, key):
+        return self._handles.get(key)
+
+    def remove(self, key):
+        self._handles.pop(key, None)
+        hash_code = self._hash_codes.pop(key, None)
+        bucket = self._buckets.get(hash_code)
+        if bucket and key in bucket:
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[hash_code]
+
+
+class PolyCountCollector:
+    DTYPE = np.dtype([("name", object), ("parent", object), ("path", object), ("shape", object),
+                      ("v", np.int64), ("e", np.int64), ("f", np.int64), ("t", np.int64)])
+
+    @classmethod
+    def get_mesh_paths(cls, nodes=None):
+        # Meshes under the given nodes, the selection, or the whole scene
+        if nodes is None:
+            nodes = cmds.ls(sl=True, long=True)
+
+        selection = om2.MSelectionList()
+        for node in nodes or []:
+            try:
+                selection.add(node)
+            except RuntimeError:
+                continue
+
+        roots = []
+        for i in range(selection.length()):
+            try:
+                roots.append(selection.getDagPath(i))
+            except TypeError:
+                continue
+
+        paths = []
+        seen = set()
+        iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+        for root in roots or [None]:
+            if root is not None:
+                iterator.reset(root, om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+            while not iterator.isDone():
+                path = iterator.getPath()
+                full_path = path.fullPathName()
+                if full_path not in seen and not om2.MFnDagNode(path).isIntermediateObject:
+                    seen.add(full_path)
+                    paths.append(path)
+                iterator.next()
+        return paths
+
+    @classmethod
+    def group_by_shape(cls, paths, shape_keys=None):
+        # Instances share one shape node, so they only need counting once
+        shape_keys = shape_keys or PolyCountShapeKeys()
+        paths_by_key = {}
+        for path in paths:
+            paths_by_key.setdefault(shape_keys.get_key(path.node()), []).append(path)
+        return paths_by_key
+
+    @classmethod
+    def count_mesh(cls, path):
+        # Every face has at least three corners, so the sum of (n - 2) over the faces is
+        # numFaceVertices - 2 * numPolygons and the face-vertex arrays never need reading
+        fn_mesh = om2.MFnMesh(path)
+        triangles = fn_mesh.numFaceVertices - 2 * fn_mesh.numPolygons
+        return fn_mesh.numVertices, fn_mesh.numEdges, fn_mesh.numPolygons, triangles
+
+    @classmethod
+    def make_rows(cls, paths, counts):
+        shape = paths[0].partialPathName()
+        rows = []
+        for path in paths:
+            parent = om2.MDagPath(path)
+            parent.pop()
+            rows.append((path.partialPathName(), parent.partialPathName(), path.fullPathName(), shape) + counts)
+        return rows
+
+    @classmethod
+    def collect(cls, nodes=None):
+        rows = []
+        for paths in cls.group_by_shape(cls.get_mesh_paths(nodes)).values():
+            rows.extend(cls.make_rows(paths, cls.count_mesh(paths[0])))
+        return np.array(rows, dtype=cls.DTYPE)
+
+
+class PolyCountTracker(QtCore.QObject):
+    # Emits the rows that changed, or None when the rows were rebuilt
+    counts_changed = QtCore.Signal(object)
+    DEBOUNCE_MS = 250
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.roots = []
+        self.counts = np.zeros(0, dtype=PolyCountCollector.DTYPE)
+
+        # Shape key -> rows, one per instance path
+        self._records = {}
+        self._shape_keys = PolyCountShapeKeys()
+        self._mesh_callbacks = {}
+        self._callbacks = []
+        self._dirty = set()
+        self._rebuild_pending = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def start(self):
+        if self._callbacks:
+            return
+        self._callbacks = [
+            om2.MDGMessage.addNodeAddedCallback(self.on_node_changed, "mesh"),
+            om2.MDGMessage.addNodeRemovedCallback(self.on_node_changed, "mesh"),
+            om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self.on_name_changed),
+            om2.MDagMessage.addAllDagChangesCallback(self.on_dag_changed),
+            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterOpen, self.on_scene_changed),
+            om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterNew, self.on_scene_changed),
+        ]
+
+    def stop(self):
+        self._timer.stop()
+        callback_ids = self._callbacks + list(self._mesh_callbacks.values())
+        if callback_ids:
+            om2.MMessage.removeCallbacks(callback_ids)
+        self._callbacks = []
+        self._mesh_callbacks = {}
+
+    def rebuild(self, nodes=None):
+        self._timer.stop()
+        self._dirty = set()
+        self._rebuild_pending = False
+        self.roots = cmds.ls(sl=True, long=True) if nodes is None else list(nodes)
+
+        if self._mesh_callbacks:
+            om2.MMessage.removeCallbacks(list(self._mesh_callbacks.values()))
+        self._mesh_callbacks = {}
+        self._records = {}
+        self._shape_keys.clear()
+
+        paths_by_key = PolyCountCollector.group_by_shape(PolyCountCollector.get_mesh_paths(self.roots),
+                                                         self._shape_keys)
+        for key, paths in paths_by_key.items():
+            self._records[key] = PolyCountCollector.make_rows(paths, PolyCountCollector.count_mesh(paths[0]))
+            self._watch(key)
+
+        self._update_counts()
+        self.counts_changed.emit(None)
+
+    def flush(self):
+        if self._rebuild_pending:
+            self.rebuild(self.roots)
+            return
+
+        dirty = self._dirty
+        self._dirty = set()
+        changed_keys = set()
+        rows_changed = False
+        for key in dirty:
+            paths = self._get_paths(self._shape_keys.get_handle(key))
+            old_rows = self._records.get(key)
+            if not paths:
+                if old_rows is not None:
+                    del self._records[key]
+                    rows_changed = True
+                self._unwatch(key)
+                self._shape_keys.remove(key)
+                continue
+
+            rows = PolyCountCollector.make_rows(paths, PolyCountCollector.count_mesh(paths[0]))
+            if old_rows is None or len(old_rows) != len(rows):
+                rows_changed = True
+            self._records[key] = rows
+            self._watch(key)
+            changed_keys.add(key)
+
+        changed_rows = self._update_counts(changed_keys)
+        self.counts_changed.emit(None if rows_changed else changed_rows)
+
+    def _update_counts(self, changed_keys=()):
+        rows = []
+        changed_rows = []
+        for key, records in self._records.items():
+            if key in changed_keys:
+                changed_rows.extend(range(len(rows), len(rows) + len(records)))
+            rows.extend(records)
+        self.counts = np.array(rows, dtype=PolyCountCollector.DTYPE)
+        return np.array(changed_rows, dtype=np.int64)
+
+    def _get_paths(self, handle):
+        if handle is None or not handle.isValid() or not handle.isAlive():
+            return []
+        node = handle.object()
+        try:
+            if om2.MFnDagNode(node).isIntermediateObject:
+                return []
+            paths = om2.MDagPath.getAllPathsTo(node)
+        except RuntimeError:
+            return []
+        return [path for path in paths if self._in_scope(path.fullPathName())]
+
+    def _in_scope(self, full_path):
+        if not self.roots:
+            return True
+        return any(full_path == root or full_path.startswith(f"{root}|") for root in self.roots)
+
+    def _watch(self, key):
+        if key in self._mesh_callbacks:
+            return
+        handle = self._shape_keys.get_handle(key)
+        if handle and handle.isValid():
+            self._mesh_callbacks[key] = om2.MPolyMessage.addPolyTopologyChangedCallback(handle.object(),
+                                                                                        self.on_node_changed)
+
+    def _unwatch(self, key):
+        callback_id = self._mesh_callbacks.pop(key, None)
+        if callback_id is not None:
+            om2.MMessage.removeCallback(callback_id)
+
+    def mark_dirty(self, node):
+        key = self._shape_keys.get_key(node)
+        self._dirty.add(key)
+        self._timer.start()
+
+    def mark_hierarchy_dirty(self, node):
+        if node.hasFn(om2.MFn.kMesh):
+            self.mark_dirty(node)
+            return
+        if not node.hasFn(om2.MFn.kDagNode):
+            return
+        try:
+            path = om2.MDagPath.getAPathTo(node)
+        except RuntimeError:
+            return
+        iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+        iterator.reset(path, om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+        while not iterator.isDone():
+            self.mark_dirty(iterator.currentItem())
+            iterator.next()
+
+    def on_node_changed(self, node, *args):
+        self.mark_dirty(node)
+
+    def on_name_changed(self, node, previous_name, *args):
+        self.mark_hierarchy_dirty(node)
+
+    def on_dag_changed(self, message, child, parent, *args):
+        self.mark_hierarchy_dirty(child.node())
+
+    def on_scene_changed(self, *args):
+        self._rebuild_pending = True
+        self._timer.start()
+
+
+class PolyCountRollup:
+    FIELDS = ("v", "e", "f", "t")
+    FIELD_ALIASES = {"vertices": "v", "edges": "e", "faces": "f", "quads": "f", "triangles": "t", "tris": "t"}
+    SCENE = ""
+
+    # Budget config:
+    # {"scene": {"tris": 2000000},
+    #  "budgets": [{"match": "char_*", "tris": 80000}, {"match": "|ENV|set_*", "tris": 500000}]}
+
+    def __init__(self):
+        # Transform path -> [v, e, f, t] of everything below it, "" is the whole scene
+        self.totals = {}
+        self.mesh_values = {}
+        self.scene_budget = {}
+        self.budgets = []
+        self._budget_nodes = None
+
+    @classmethod
+    def get_parent_path(cls, path):
+        return path.rpartition("|")[0] or cls.SCENE
+
+    @classmethod
+    def get_ancestors(cls, path):
+        while path != cls.SCENE:
+            path = cls.get_parent_path(path)
+            yield path
+
+    @classmethod
+    def parse_limits(cls, config):
+        limits = {}
+        for key, value in config.items():
+            field = cls.FIELD_ALIASES.get(key.lower(), key.lower())
+            if field in cls.FIELDS and value:
+                limits[field] = int(value)
+        return limits
+
+    def build(self, counts):
+        values = np.stack([counts[field] for field in self.FIELDS], axis=1) if len(counts) else np.zeros((0, 4), np.int64)
+
+        self.mesh_values = {}
+        self.totals = {self.SCENE: np.zeros(len(self.FIELDS), dtype=np.int64)}
+        self._budget_nodes = None
+
+        # Shapes add into their transform, then each depth adds into the one above it
+        levels = {}
+        for path, value in zip(counts["path"], values):
+            self.mesh_values[path] = value
+            self._add_to(self.get_parent_path(path), value, levels)
+
+        for depth in range(max(levels, default=0), 0, -1):
+            for path in levels.get(depth, []):
+                self._add_to(self.get_parent_path(path), self.totals[path], levels)
+
+    def _add_to(self, path, value, levels):
+        total = self.totals.get(path)
+        if total is None:
+            self.totals[path] = value.copy()
+            if path != self.SCENE:
+                levels.setdefault(path.count("|"), []).append(path)
+        else:
+            total += value
+
+    def update(self, counts, rows):
+        for row in rows:
+            path = counts["path"][row]
+            old_value = self.mesh_values.get(path)
+            if old_value is None:
+                self.build(counts)
+                return
+
+            value = np.array([counts[field][row] for field in self.FIELDS], dtype=np.int64)
+            delta = value - old_value
+            if not delta.any():
+                continue
+            self.mesh_values[path] = value
+            for ancestor in self.get_ancestors(path):
+                self.totals[ancestor] += delta
+
+    def load_budgets(self, config_path):
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        self.set_budgets(config)
+
+    def set_budgets(self, config):
+        self.scene_budget = self.parse_limits(config.get("scene", {}))
+        self.budgets = [(rule["match"], self.parse_limits(rule)) for rule in config.get("budgets", [])]
+        self._budget_nodes = None
+
+    def get_budget_nodes(self):
+        # Matching only reruns when the hierarchy or the config changes
+        if self._budget_nodes is None:
+            nodes = []
+            if self.scene_budget:
+                nodes.append((self.SCENE, self.scene_budget))
+            for path in sorted(self.totals):
+                if path == self.SCENE:
+                    continue
+                name = path.rpartition("|")[2]
+                for pattern, limits in self.budgets:
+                    if fnmatch.fnmatchcase(path if "|" in pattern else name, pattern):
+                        nodes.append((path, limits))
+                        break
+            self._budget_nodes = nodes
+        return self._budget_nodes
+
+    def check(self):
+        results = []
+        for path, limits in self.get_budget_nodes():
+            total = self.totals[path]
+            totals = {field: int(total[i]) for i, field in enumerate(self.FIELDS)}
+            # Same test as the table, a count is only valid while it is below its limit
+            over = [field for field, limit in limits.items() if totals[field] >= limit]
+            results.append({"node": path, "totals": totals, "limits": limits, "over": over})
+        return results
+
+
+class PolyDensityHeatmap:
+    COLOR_SET = "polyCountDensity"
+    PALETTE_SIZE = 256
+    _palette = None
+
+    def __init__(self):
+        # Shape key -> (topology key, per face density), kept until the topology changes
+        self._densities = {}
+        # Shape key -> (topology key, index arrays from get_topology)
+        self._topologies = {}
+        self._shape_keys = PolyCountShapeKeys()
+        # Shape key -> (path, topology key, range, density) of the meshes currently coloured
+        self._coloured = {}
+        self._display_colors = {}
+        self.density_range = None
+
+    @classmethod
+    def get_topology_key(cls, fn_mesh):
+        return fn_mesh.numVertices, fn_mesh.numEdges, fn_mesh.numPolygons, fn_mesh.numFaceVertices
+
+    @classmethod
+    def get_topology(cls, fn_mesh):
+        # Index arrays that only change with the topology, so a moved vertex doesn't convert them again
+        face_vertex_counts, face_vertices = fn_mesh.getVertices()
+        face_vertex_counts = np.fromiter(face_vertex_counts, dtype=np.int64, count=len(face_vertex_counts))
+        face_vertices = np.fromiter(face_vertices, dtype=np.int64, count=len(face_vertices))
+
+        # Fan triangulation, face i gives the triangles (s, s + k, s + k + 1) for k in 1..n - 2
+        face_count = len(face_vertex_counts)
+        starts = np.concatenate(([0], np.cumsum(face_vertex_counts)[:-1]))
+        triangle_counts = np.maximum(face_vertex_counts - 2, 0)
+        triangle_faces = np.repeat(np.arange(face_count), triangle_counts)
+        triangle_starts = np.repeat(starts, triangle_counts)
+        offsets = np.arange(len(triangle_faces)) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts) + 1
+
+        return {"face_vertex_counts": face_vertex_counts,
+                "triangle_faces": triangle_faces,
+                "triangles": (face_vertices[triangle_starts],
+                              face_vertices[triangle_starts + offsets],
+                              face_vertices[triangle_starts + offsets + 1]),
+                "face_ids": om2.MIntArray(range(face_count))}
+
+    @classmethod
+    def get_points(cls, path):
+        # xform hands back one flat list of floats, far cheaper to convert than an MPointArray
+        points = cmds.xform(f"{path.fullPathName()}.vtx[*]", q=True, objectSpace=True, translation=True) or []
+        return np.array(points, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def get_face_density(cls, topology, points):
+        face_vertex_counts = topology["face_vertex_counts"]
+        a, b, c = (points[indices] for indices in topology["triangles"])
+        triangle_areas = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+        face_areas = np.bincount(topology["triangle_faces"], weights=triangle_areas, minlength=len(face_vertex_counts))
+
+        # Vertices per unit area, on a log scale so a few tiny faces don't flatten the ramp
+        return np.log10(face_vertex_counts / np.maximum(face_areas, 1e-12))
+
+    @classmethod
+    def get_colours(cls, density, density_range):
+        low, high = density_range
+        value = np.clip((density - low) / max(high - low, 1e-6), 0.0, 1.0)
+        colours = np.empty((len(value), 4), dtype=np.float64)
+        colours[:, 0] = value
+        colours[:, 1] = 1.0 - np.abs(2.0 * value - 1.0)
+        colours[:, 2] = 1.0 - value
+        colours[:, 3] = 1.0
+        return colours
+
+    @classmethod
+    def get_palette(cls):
+        # The ramp in PALETTE_SIZE steps, faces pick an MColor from it instead of building one each
+        if cls._palette is None:
+            ramp = cls.get_colours(np.linspace(0.0, 1.0, cls.PALETTE_SIZE), (0.0, 1.0))
+            cls._palette = [om2.MColor(colour) for colour in ramp.tolist()]
+        return cls._palette
+
+    def get_density(self, key, path, refresh=False):
+        # Only the points are read again on a refresh, the index arrays last until the topology changes
+        fn_mesh = om2.MFnMesh(path)
+        topology_key = self.get_topology_key(fn_mesh)
+        topology = self._topologies.get(key)
+        if topology is None or topology[0] != topology_key:
+            topology = self._topologies[key] = (topology_key, self.get_topology(fn_mesh))
+            refresh = True
+        cached = self._densities.get(key)
+        if refresh or cached is None:
+            cached = self._densities[key] = (topology_key, self.get_face_density(topology[1], self.get_points(path)))
+        return cached
+
+    def apply(self, shapes, keep_range=False):
+        paths = {}
+        for shape in shapes:
+            selection = om2.MSelectionList()
+            try:
+                selection.add(shape)
+                path = selection.getDagPath(0)
+            except (RuntimeError, TypeError):
+                continue
+            paths.setdefault(self._shape_keys.get_key(path.node()), path)
+
+        # A full update picks up moved vertices too, a partial one only the meshes whose topology changed
+        densities = {key: self.get_density(key, path, refresh=not keep_range) for key, path in paths.items()}
+
+        # One range for every mesh so densities compare across the scene, a partial update keeps the old one
+        if not keep_range or self.density_range is None:
+            values = [density for topology_key, density in densities.values() if len(density)]
+            if values:
+                values = np.concatenate(values)
+                self.density_range = tuple(np.percentile(values, (2, 98)).tolist())
+            else:
+                self.density_range = (0.0, 1.0)
+
+        for key, path in paths.items():
+            topology_key, density = densities[key]
+            coloured = self._coloured.get(key)
+            if coloured and coloured[1:3] == (topology_key, self.density_range) and coloured[3] is density:
+                continue
+            self.write_colours(path, density, self._topologies[key][1]["face_ids"])
+            self._coloured[key] = (path.fullPathName(), topology_key, self.density_range, density)
+
+    def write_colours(self, path, density, face_ids):
+        fn_mesh = om2.MFnMesh(path)
+        full_path = path.fullPathName()
+        if full_path not in self._display_colors:
+            # Put back by clear, along with whichever colour set was current before
+            self._display_colors[full_path] = (cmds.getAttr(f"{full_path}.displayColors"),
+                                               fn_mesh.currentColorSetName())
+        if self.COLOR_SET not in fn_mesh.getColorSetNames():
+            fn_mesh.createColorSet(self.COLOR_SET, True)
+        fn_mesh.setCurrentColorSetName(self.COLOR_SET)
+
+        low, high = self.density_range
+        steps = np.clip((density - low) / max(high - low, 1e-6), 0.0, 1.0) * (self.PALETTE_SIZE - 1)
+        palette = self.get_palette()
+        colours = om2.MColorArray([palette[step] for step in np.rint(steps).astype(np.int64).tolist()])
+        fn_mesh.setFaceColors(colours, face_ids, om2.MFnMesh.kRGBA)
+        cmds.setAttr(f"{full_path}.displayColors", True)
+
+    def clear(self):
+        for full_path, (display_colors, colour_set) in self._display_colors.items():
+            if not cmds.objExists(full_path):
+                continue
+            colour_sets = cmds.polyColorSet(full_path, q=True, allColorSets=True) or []
+            if self.COLOR_SET in colour_sets:
+                cmds.polyColorSet(full_path, delete=True, colorSet=self.COLOR_SET)
+            if colour_set and colour_set != self.COLOR_SET and colour_set in colour_sets:
+                cmds.polyColorSet(full_path, currentColorSet=True, colorSet=colour_set)
+            cmds.setAttr(f"{full_path}.displayColors", display_colors)
+        self._display_colors = {}
+        self._coloured = {}
+
+
+class PolyCountTableModel(QtCore.QAbstractTableModel):
+    HEADERS = ["Name", "Vertices", "Edges", "Tris", "Quads"]
+    # Table column -> field in the counts array
+    COLUMN_FIELDS = {1: "v", 2: "e", 3: "t", 4: "f"}
+
+    VALID_COLOUR = QtGui.QColor(43, 43, 43)
+    INVALID_COLOUR = QtGui.QColor(100, 0, 0)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.counts = np.zeros(0, dtype=PolyCountCollector.DTYPE)
+        # Display row -> record index, and its inverse
+        self.order = np.zeros(0, dtype=np.int64)
+        self.inverse_order = np.zeros(0, dtype=np.int64)
+        self.limits = {column: 0 for column in self.COLUMN_FIELDS}
+        # Table column -> boolean array of records under the limit
+        self.valid_masks = {}
+        self.sort_column = -1
+        self.sort_order = QtCore.Qt.AscendingOrder
+
+    def set_counts(self, counts):
+        self.beginResetModel()
+        self.counts = counts
+        self.valid_masks = {}
+        self._sort_records()
+        self.endResetModel()
+        for column in self.COLUMN_FIELDS:
+            self.set_limit(column, self.limits[column])
+
+    def update_rows(self, counts, records):
+        self.counts = counts
+        if len(records) and self.sort_column >= 0:
+            self.layoutAboutToBeChanged.emit()
+            self._sort_records()
+            self.layoutChanged.emit()
+        self._emit_rows_changed(records, 0, len(self.HEADERS) - 1)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.counts)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.order[index.row()]
+        column = index.column()
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.UserRole):
+            if column == 0:
+                return self.counts["name"][record]
+            value = int(self.counts[self.COLUMN_FIELDS[column]][record])
+            return value if role == QtCore.Qt.UserRole else f"{value}"
+        if role == QtCore.Qt.BackgroundRole and column in self.COLUMN_FIELDS:
+            valid = self.valid_masks.get(column)
+            if valid is not None:
+                return self.VALID_COLOUR if valid[record] else self.INVALID_COLOUR
+        return None
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = column
+        self.sort_order = order
+        self._sort_records()
+        self.layoutChanged.emit()
+
+    def _sort_records(self):
+        if self.sort_column < 0 or not len(self.counts):
+            self.order = np.arange(len(self.counts))
+        else:
+            field = "name" if self.sort_column == 0 else self.COLUMN_FIELDS[self.sort_column]
+            self.order = np.argsort(self.counts[field], kind="stable")
+            if self.sort_order == QtCore.Qt.DescendingOrder:
+                self.order = self.order[::-1]
+        self.inverse_order = np.empty_like(self.order)
+        self.inverse_order[self.order] = np.arange(len(self.order))
+
+    def set_limit(self, column, limit):
+        self.limits[column] = limit
+        valid = self.counts[self.COLUMN_FIELDS[column]] < limit
+        previous = self.valid_masks.get(column)
+        self.valid_masks[column] = valid
+        if previous is None or len(previous) != len(valid):
+            self._emit_rows_changed(np.arange(len(valid)), column, column)
+        else:
+            # Only records that crossed the limit need repainting
+            self._emit_rows_changed(np.flatnonzero(valid != previous), column, column)
+
+    def _emit_rows_changed(self, records, first_column, last_column):
+        if not len(records):
+            return
+        rows = self.inverse_order[records]
+        self.dataChanged.emit(self.index(int(rows.min()), first_column), self.index(int(rows.max()), last_column))
+
+    def get_over_budget_mask(self):
+        over_budget = np.zeros(len(self.counts), dtype=bool)
+        for valid in self.valid_masks.values():
+            over_budget |= ~valid
+        return over_budget
+
+    def get_top_mask(self, column, count):
+        values = self.counts[self.COLUMN_FIELDS[column]]
+        top = np.zeros(len(values), dtype=bool)
+        if count >= len(values):
+            top[:] = True
+        elif count > 0:
+            # Partial sort, the n largest end up in the last n slots in no particular order
+            top[np.argpartition(values, len(values) - count)[len(values) - count:]] = True
+        return top
+
+    def get_nodes(self, column):
+        # (valid, invalid) transforms for a column, one per instance so every instance gets coloured,
+        # and a transform is invalid if any of its shapes are
+        valid = self.valid_masks.get(column)
+        if valid is None:
+            return [], []
+        parents = self.counts["parent"]
+        invalid_nodes = set(parents[~valid])
+        valid_nodes = set(parents[valid]) - invalid_nodes
+        return sorted(valid_nodes), sorted(invalid_nodes)
+
+    def get_record(self, row):
+        return self.counts[self.order[row]]
+
+
+class PolyCountFilterProxy(QtCore.QSortFilterProxyModel):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.over_budget_only = False
+        self.top_count = 0
+        self.top_column = 3
+        # Source row -> accepted
+        self.accepted = None
+
+    def set_over_budget_only(self, enabled):
+        self.over_budget_only = enabled
+        self.update_filter()
+
+    def set_top(self, count, column=None):
+        self.top_count = count
+        if column is not None:
+            self.top_column = column
+        self.update_filter()
+
+    def update_filter(self):
+        model = self.sourceModel()
+        if not self.over_budget_only and not self.top_count:
+            self.accepted = None
+        else:
+            accepted = np.ones(len(model.counts), dtype=bool)
+            if self.over_budget_only:
+                accepted &= model.get_over_budget_mask()
+            if self.top_count:
+                accepted &= model.get_top_mask(self.top_column, self.top_count)
+            # Masks are per record, the proxy works in the model's display order
+            self.accepted = accepted[model.order]
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.accepted is None or source_row >= len(self.accepted):
+            return True
+        return bool(self.accepted[source_row])
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        # Sorting is done by the source model with numpy rather than lessThan per pair
+        self.sourceModel().sort(column, order)
+        if self.accepted is not None:
+            self.update_filter()
+
+
+class PolyCountTableView(QtWidgets.QTableView):
     def __init__(self):
         super().__init__()
 
@@ -179,112 +1019,71 @@ class TableWidget(QtWidgets.QTableWidget):
         self.tris_limit = 0
         self.quad_limit = 0
 
-        self.vertex_nodes_valid = []
-        self.vertex_nodes_invalid = []
-
-        self.edge_nodes_valid = []
-        self.edge_nodes_invalid = []
-
-        self.tris_nodes_valid = []
-        self.tris_nodes_invalid = []
-
-        self.quad_nodes_valid = []
-        self.quad_nodes_invalid = []
-
         self.column_width = 50
 
-        self.node_list = []
-        self.current_row = 0
+        self.poly_count_model = PolyCountTableModel(self)
+        self.filter_proxy = PolyCountFilterProxy(self)
+        self.filter_proxy.setSourceModel(self.poly_count_model)
+        self.setModel(self.filter_proxy)
 
         self.create_widgets()
 
-
-
     def create_widgets(self):
-        self.setColumnCount(5)
-        # self.setRowCount(0)
-
-        header_view = QtWidgets.QHeaderView(QtCore.Qt.Horizontal, self)
-        self.setHorizontalHeader(header_view)
-        self.setHorizontalHeaderLabels(["Name", "Vertices", "Edges", "Tris", "Quads"])
+        header_view = self.horizontalHeader()
         header_view.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
         header_view.setSectionResizeMode(1, QtWidgets.QHeaderView.Fixed)
         header_view.setSectionResizeMode(2, QtWidgets.QHeaderView.Fixed)
         header_view.setSectionResizeMode(3, QtWidgets.QHeaderView.Fixed)
         header_view.setSectionResizeMode(4, QtWidgets.QHeaderView.Fixed)
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
 
         self.setColumnWidth(1, self.column_width)
         self.setColumnWidth(2, self.column_width)
         self.setColumnWidth(3, self.column_width)
         self.setColumnWidth(4, self.column_width)
-        #
-        # for i  in range(5):
-        #     for j in range(5):
-        #         self.setItem(i, j, QtWidgets.QTableWidgetItem(f"{i}:{j}"))
-
-        # self.setHorizontalHeaderLabels(["", "file", "orig", "new", "open"])
 
-    def add_row(self, node):
-        values = PolyCountHelpers.get_polycount(node)
-        # print(values)
-        self.setRowCount(self.current_row + 1)
+        # Indicator first, enabling sorting sorts straight away on whatever indicator is set
+        header_view.setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.setSortingEnabled(True)
 
-        name_item = QtWidgets.QTableWidgetItem(f"{node}")
-        name_item.setFlags(QtCore.Qt.ItemIsEnabled)
-        self.setItem(self.current_row, 0, name_item)
+    @property
+    def counts(self):
+        return self.poly_count_model.counts
 
-        vertex_item = QtWidgets.QTableWidgetItem(f"{values[0]}")
-        vertex_item.setFlags(QtCore.Qt.ItemIsEnabled)
-        self.setItem(self.current_row, 1, vertex_item)
-
-        edge_item = QtWidgets.QTableWidgetItem(f"{values[1]}")
-        edge_item.setFlags(QtCore.Qt.ItemIsEnabled)
-        self.setItem(self.current_row, 2, edge_item)
-
-        tris_item = QtWidgets.QTableWidgetItem(f"{values[2]}")
-        tris_item.setFlags(QtCore.Qt.ItemIsEnabled)
-        self.setItem(self.current_row, 3, tris_item)
-
-        quad_item = QtWidgets.QTableWidgetItem(f"{values[3]}")
-        quad_item.setFlags(QtCore.Qt.ItemIsEnabled)
-        self.setItem(self.current_row, 4, quad_item)
-        self.current_row += 1
+    def set_counts(self, counts):
+        self.poly_count_model.set_counts(counts)
+        self.filter_proxy.update_filter()
 
+    def update_rows(self, counts, rows):
+        self.poly_count_model.update_rows(counts, rows)
+        if self.filter_proxy.accepted is not None:
+            self.filter_proxy.update_filter()
 
     def clear_table(self):
-        self.file_node_list = []
-        self.current_row = 0
-        self.setRowCount(0)
-
-    def change_colour(self, index: int, valid_nodes_list: list, invalid_nodes_list: list, limit: int):
-        for i in range(self.current_row):
-            name = cmds.listRelatives(self.item(i, 0).text(), parent=True)[0]
-            # print(f"parent = {name}")
-            if int(self.item(i, index).text()) < limit:
-                self.item(i, index).setBackground(QtGui.QColor(43, 43, 43))
-                if name not in valid_nodes_list:
-                    valid_nodes_list.append(name)
-                if name in invalid_nodes_list:
-                    invalid_nodes_list.remove(name)
+        self.set_counts(np.zeros(0, dtype=PolyCountCollector.DTYPE))
 
-            else:
-                self.item(i, index).setBackground(QtGui.QColor(100, 0, 0))
-                if name in valid_nodes_list:
-                    valid_nodes_list.remove(name)
-                if name not in invalid_nodes_list:
-                    invalid_nodes_list.append(name)
+    def change_colour(self, index: int, limit: int):
+        self.poly_count_model.set_limit(index, limit)
+        if self.filter_proxy.over_budget_only:
+            self.filter_proxy.update_filter()
+
+    def get_nodes(self, index):
+        return self.poly_count_model.get_nodes(index)
 
+    def get_record(self, proxy_index):
+        return self.poly_count_model.get_record(self.filter_proxy.mapToSource(proxy_index).row())
 
     def change_colour_vertex(self):
-        self.change_colour(1, self.vertex_nodes_valid, self.vertex_nodes_invalid, self.vertex_limit)
+        self.change_colour(1, self.vertex_limit)
 
     def change_colour_edge(self):
-        self.change_colour(2, self.edge_nodes_valid, self.edge_nodes_invalid, self.edge_limit)
+        self.change_colour(2, self.edge_limit)
 
     def change_colour_tris(self):
-        self.change_colour(3, self.tris_nodes_valid, self.tris_nodes_invalid, self.tris_limit)
+        self.change_colour(3, self.tris_limit)
+
     def change_colour_quads(self):
-        self.change_colour(4, self.quad_nodes_valid, self.quad_nodes_invalid, self.quad_limit)
+        self.change_colour(4, self.quad_limit)
 
     def set_vertex_limit(self, limit):
         self.vertex_limit = int(limit)
@@ -298,9 +1097,6 @@ class TableWidget(QtWidgets.QTableWidget):
     def set_tris_limit(self, limit):
         self.tris_limit = int(limit)
 
-    def select_item(self):
-        print("")
-
 class PolyCountVisualiser_UI(QtWidgets.QDialog):
     TITLE = "Poly Count Visualiser UI"
 
@@ -318,6 +1114,11 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
         self.render_layer_helper = RenderLayerHelpers()
         cmds.select(clear=True)
 
+        self.poly_count_tracker = PolyCountTracker(self)
+        self.poly_count_rollup = PolyCountRollup()
+        self.visualised_column = 0
+        self.density_heatmap = PolyDensityHeatmap()
+
         self.create_widgets()
         self.create_layouts()
         self.create_connections()
@@ -329,24 +1130,30 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
     def load_option_variables(self):
         if cmds.optionVar(exists="polyCountChecker_Vertex_Limit"):
             value = cmds.optionVar(q="polyCountChecker_Vertex_Limit")
-            self.table_widget.set_vertex_limit(value)
+            self.table_view.set_vertex_limit(value)
             self.vertex_limit_sb.set_value(value)
 
         if cmds.optionVar(exists="polyCountChecker_Edge_Limit"):
             value = cmds.optionVar(q="polyCountChecker_Edge_Limit")
-            self.table_widget.set_edge_limit(value)
+            self.table_view.set_edge_limit(value)
             self.edge_limit_sb.set_value(value)
 
         if cmds.optionVar(exists="polyCountChecker_Tri_Limit"):
             value = cmds.optionVar(q="polyCountChecker_Tri_Limit")
-            self.table_widget.set_tris_limit(value)
+            self.table_view.set_tris_limit(value)
             self.tris_limit_sb.set_value(value)
 
         if cmds.optionVar(exists="polyCountChecker_Quad_Limit"):
             value = cmds.optionVar(q="polyCountChecker_Quad_Limit")
-            self.table_widget.set_quad_limit(value)
+            self.table_view.set_quad_limit(value)
             self.quad_limit_sb.set_value(value)
 
+        if cmds.optionVar(exists="polyCountChecker_Direct_Shading"):
+            self.direct_shading_cb.setChecked(bool(cmds.optionVar(q="polyCountChecker_Direct_Shading")))
+
+        if cmds.optionVar(exists="polyCountChecker_Budget_Config"):
+            self.load_budget_config(cmds.optionVar(q="polyCountChecker_Budget_Config"))
+
     def create_widgets(self):
         self.vertex_limit_label = QtWidgets.QLabel("Vertex Limit")
         self.vertex_limit_label.setFixedWidth(80)
@@ -362,12 +1169,37 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
         self.tris_limit_sb = CustomMayaSlider()
         self.quad_limit_sb = CustomMayaSlider()
 
-        self.table_widget = TableWidget()
+        self.table_view = PolyCountTableView()
+
+        self.over_budget_cb = QtWidgets.QCheckBox("Over budget only")
+        self.top_count_sb = QtWidgets.QSpinBox()
+        self.top_count_sb.setRange(0, 999999)
+        self.top_count_sb.setSpecialValueText("All")
+        self.top_count_sb.setToolTip("Only show the worst meshes for the chosen count")
+        self.top_column_cmb = QtWidgets.QComboBox()
+        self.top_column_cmb.addItems(["Vertices", "Edges", "Tris", "Quads"])
+        self.top_column_cmb.setCurrentIndex(2)
+
+        self.budget_config_le = QtWidgets.QLineEdit()
+        self.budget_config_le.setPlaceholderText("Budget config (.json)")
+        self.budget_config_btn = QtWidgets.QPushButton("...")
+        self.budget_config_btn.setFixedWidth(30)
+        self.budget_tree = QtWidgets.QTreeWidget()
+        self.budget_tree.setHeaderLabels(["Node", "Vertices", "Edges", "Tris", "Quads"])
+        self.budget_tree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.budget_tree.header().setStretchLastSection(False)
 
         self.vertex_btn = QtWidgets.QPushButton("Vertex")
         self.edge_btn = QtWidgets.QPushButton("Edge")
         self.tris_btn = QtWidgets.QPushButton("Triangles")
         self.quad_btn = QtWidgets.QPushButton("Quads")
+        self.density_btn = QtWidgets.QPushButton("Density")
+        self.density_btn.setCheckable(True)
+        self.density_btn.setToolTip("Colour every face by its vertex density")
+
+        self.direct_shading_cb = QtWidgets.QCheckBox("Direct shading")
+        self.direct_shading_cb.setToolTip("Assign the shaders to the meshes directly instead of switching render layers")
+        self.direct_shading_cb.setChecked(True)
 
         self.refresh_button = QtWidgets.QPushButton("Refresh")
 
@@ -377,6 +1209,7 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
         button_layout.addWidget(self.edge_btn)
         button_layout.addWidget(self.tris_btn)
         button_layout.addWidget(self.quad_btn)
+        button_layout.addWidget(self.density_btn)
 
 
         row_layout =QtWidgets.QVBoxLayout()
@@ -402,10 +1235,31 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
         row_layout.addLayout(tri_limit_layout)
         row_layout.addLayout(quad_limit_layout)
 
+        filter_layout = QtWidgets.QHBoxLayout()
+        filter_layout.addWidget(self.over_budget_cb)
+        filter_layout.addStretch()
+        filter_layout.addWidget(QtWidgets.QLabel("Top"))
+        filter_layout.addWidget(self.top_count_sb)
+        filter_layout.addWidget(self.top_column_cmb)
+
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.addLayout(row_layout)
-        main_layout.addWidget(self.table_widget)
-        main_layout.addWidget(QtWidgets.QLabel("Visualise"))
+        main_layout.addLayout(filter_layout)
+        main_layout.addWidget(self.table_view)
+
+        budget_config_layout = QtWidgets.QHBoxLayout()
+        budget_config_layout.addWidget(QtWidgets.QLabel("Budgets"))
+        budget_config_layout.addWidget(self.budget_config_le)
+        budget_config_layout.addWidget(self.budget_config_btn)
+
+        main_layout.addLayout(budget_config_layout)
+        main_layout.addWidget(self.budget_tree)
+        visualise_layout = QtWidgets.QHBoxLayout()
+        visualise_layout.addWidget(QtWidgets.QLabel("Visualise"))
+        visualise_layout.addStretch()
+        visualise_layout.addWidget(self.direct_shading_cb)
+
+        main_layout.addLayout(visualise_layout)
         main_layout.addLayout(button_layout)
         main_layout.addWidget(self.refresh_button)
 
@@ -415,68 +1269,174 @@ class PolyCountVisualiser_UI(QtWidgets.QDialog):
         self.tris_limit_sb.valueChanged.connect(self.tris_limit_changed)
         self.quad_limit_sb.valueChanged.connect(self.quad_limit_changed)
 
-        self.table_widget.itemClicked.connect(self.item_clicked)
+        self.table_view.clicked.connect(self.item_clicked)
+        self.over_budget_cb.toggled.connect(self.table_view.filter_proxy.set_over_budget_only)
+        self.top_count_sb.valueChanged.connect(self.top_filter_changed)
+        self.top_column_cmb.currentIndexChanged.connect(self.top_filter_changed)
 
         self.vertex_btn.clicked.connect(self.vertex_visualisation)
         self.edge_btn.clicked.connect(self.edge_visualisation)
         self.tris_btn.clicked.connect(self.tris_visualisation)
         self.quad_btn.clicked.connect(self.quad_visualisation)
+        self.density_btn.toggled.connect(self.density_visualisation)
 
-        self.refresh_button.clicked.connect(self.refresh)
+        self.budget_config_btn.clicked.connect(self.browse_budget_config)
+        self.budget_config_le.editingFinished.connect(lambda: self.load_budget_config(self.budget_config_le.text()))
+        self.budget_tree.itemClicked.connect(self.budget_item_clicked)
 
-    def item_clicked(self,  item):
-        row = self.table_widget.indexFromItem(item).row()
-        geo = self.table_widget.item(row, 0).text()
-        cmds.select(cmds.listRelatives(geo, parent=True)[0])
+        self.direct_shading_cb.toggled.connect(self.direct_shading_toggled)
+
+        self.refresh_button.clicked.connect(self.refresh)
+        self.poly_count_tracker.counts_changed.connect(self.counts_changed)
+
+    def item_clicked(self, index):
+        cmds.select(self.table_view.get_record(index)["parent"])
+
+    def budget_item_clicked(self, item, column):
+        node = item.data(0, QtCore.Qt.UserRole)
+        if node:
+            cmds.select(node)
+        else:
+            cmds.select(clear=True)
+
+    def browse_budget_config(self):
+        location = QtWidgets.QFileDialog.getOpenFileName(self, "Select Budget Config", "", "JSON (*.json)")[0]
+        if location:
+            self.load_budget_config(location)
+
+    def load_budget_config(self, config_path):
+        self.budget_config_le.setText(config_path)
+        if not config_path:
+            self.poly_count_rollup.set_budgets({})
+        elif not os.path.isfile(config_path):
+            cmds.warning(f"Budget config not found: {config_path}")
+            return
+        else:
+            try:
+                self.poly_count_rollup.load_budgets(config_path)
+            except (ValueError, KeyError, TypeError) as e:
+                cmds.warning(f"Couldn't read budget config {config_path}: {e}")
+                return
+        cmds.optionVar(sv=("polyCountChecker_Budget_Config", config_path))
+        self.update_budget_tree()
+
+    def update_budget_tree(self):
+        self.budget_tree.clear()
+        items = {}
+        red = QtGui.QColor(225, 80, 80)
+        for result in self.poly_count_rollup.check():
+            node = result["node"]
+
+            # Nest under the closest ancestor that has a budget of its own
+            parent_item = None
+            for ancestor in self.poly_count_rollup.get_ancestors(node):
+                parent_item = items.get(ancestor)
+                if parent_item:
+                    break
+
+            item = QtWidgets.QTreeWidgetItem(parent_item or self.budget_tree)
+            item.setText(0, node.rpartition("|")[2] or "Scene")
+            item.setToolTip(0, node or "Scene")
+            item.setData(0, QtCore.Qt.UserRole, node)
+            for column, field in enumerate(("v", "e", "t", "f"), 1):
+                limit = result["limits"].get(field)
+                total = result["totals"][field]
+                item.setText(column, f"{total} / {limit}" if limit else str(total))
+                item.setTextAlignment(column, QtCore.Qt.AlignCenter)
+                if field in result["over"]:
+                    item.setForeground(column, red)
+            if result["over"]:
+                item.setForeground(0, red)
+            items[node] = item
+
+        self.budget_tree.expandAll()
+
+    def top_filter_changed(self, *args):
+        self.table_view.filter_proxy.set_top(self.top_count_sb.value(), self.top_column_cmb.currentIndex() + 1)
 
     def refresh(self):
-        self.table_widget.clear_table()
-        nodes = PolyCountHelpers.get_selected_nodes()
-        # print(nodes)
-        # print(self.table_widget.vertex_nodes_valid)
-        # print(self.table_widget.vertex_nodes_invalid)
-        for node in nodes:
-            self.table_widget.add_row(node)
+        self.poly_count_tracker.start()
+        self.poly_count_tracker.rebuild()
+
+    def counts_changed(self, rows):
+        if rows is None:
+            self.table_view.clear_table()
+            self.table_view.set_counts(self.poly_count_tracker.counts)
+            self.poly_count_rollup.build(self.poly_count_tracker.counts)
+        else:
+            self.table_view.update_rows(self.poly_count_tracker.counts, rows)
+            self.poly_count_rollup.update(self.poly_count_tracker.counts, rows)
+        self.update_budget_tree()
 
         self.vertex_limit_changed(self.vertex_limit_sb.get_value())
         self.edge_limit_changed(self.edge_limit_sb.get_value())
         self.tris_limit_changed(self.tris_limit_sb.get_value())
         self.quad_limit_changed(self.quad_limit_sb.get_value())
 
+        if self.density_btn.isChecked():
+            counts = self.poly_count_tracker.counts
+            if rows is None:
+                self.density_heatmap.apply(np.unique(counts["shape"]).tolist())
+            elif len(rows):
+                self.density_heatmap.apply(np.unique(counts["shape"][rows]).tolist(), keep_range=True)
+
+    def visualise(self, column):
+        self.visualised_column = column
+        self.density_btn.setChecked(False)
+        if self.direct_shading_cb.isChecked():
+            self.render_layer_helper.set_direct_assignment(*self.table_view.get_nodes(column))
+        else:
+            self.render_layer_helper.set_vertex_layer(*self.table_view.get_nodes(column))
+
+    def direct_shading_toggled(self, checked):
+        cmds.optionVar(iv=("polyCountChecker_Direct_Shading", int(checked)))
+        if self.visualised_column:
+            self.visualise(self.visualised_column)
+
+    def density_visualisation(self, checked):
+        if checked:
+            # The shaders would tint the face colours, so the original assignments come back first
+            self.render_layer_helper.restore_assignments()
+            self.density_heatmap.apply(np.unique(self.poly_count_tracker.counts["shape"]).tolist())
+        else:
+            self.density_heatmap.clear()
+
     def vertex_visualisation(self):
-        self.render_layer_helper.set_vertex_layer(self.table_widget.vertex_nodes_valid, self.table_widget.vertex_nodes_invalid)
+        self.visualise(1)
 
     def edge_visualisation(self):
-        self.render_layer_helper.set_vertex_layer(self.table_widget.edge_nodes_valid, self.table_widget.edge_nodes_invalid)
+        self.visualise(2)
 
     def tris_visualisation(self):
-        self.render_layer_helper.set_vertex_layer(self.table_widget.tris_nodes_valid, self.table_widget.tris_nodes_invalid)
+        self.visualise(3)
 
     def quad_visualisation(self):
-        self.render_layer_helper.set_vertex_layer(self.table_widget.quad_nodes_valid, self.table_widget.quad_nodes_invalid)
+        self.visualise(4)
 
     def vertex_limit_changed(self, limit):
         cmds.optionVar(iv=("polyCountChecker_Vertex_Limit", limit))
-        self.table_widget.set_vertex_limit(limit)
-        self.table_widget.change_colour_vertex()
+        self.table_view.set_vertex_limit(limit)
+        self.table_view.change_colour_vertex()
 
     def edge_limit_changed(self, limit):
         cmds.optionVar(iv=("polyCountChecker_Edge_Limit", limit))
-        self.table_widget.set_edge_limit(limit)
-        self.table_widget.change_colour_edge()
+        self.table_view.set_edge_limit(limit)
+        self.table_view.change_colour_edge()
 
     def tris_limit_changed(self, limit):
         cmds.optionVar(iv=("polyCountChecker_Tri_Limit", limit))
-        self.table_widget.set_tris_limit(limit)
-        self.table_widget.change_colour_tris()
+        self.table_view.set_tris_limit(limit)
+        self.table_view.change_colour_tris()
 
     def quad_limit_changed(self, limit):
         cmds.optionVar(iv=("polyCountChecker_Quad_Limit", limit))
-        self.table_widget.set_quad_limit(limit)
-        self.table_widget.change_colour_quads()
+        self.table_view.set_quad_limit(limit)
+        self.table_view.change_colour_quads()
 
     def closeEvent(self, event):
         super().closeEvent(event)
+        self.poly_count_tracker.stop()
+        self.density_heatmap.clear()
         # # mel.eval('catchQuiet( delete("rs_PolyCountVisualisation") );')
         # mel.eval('MLdeleteUnused;')
         # mel.eval('delete("rs_PolyCountVisualisation");')
@@ -491,7 +1451,5 @@ if __name__ == "__main__":
     except:
         pass
 
-    cmds.file(r"C:/Users/vboxuser/Desktop/BugsMaya/scenes/testScene.mb", o=True, force=True)
-
     PolyCountVisualiser_UI_dialog = PolyCountVisualiser_UI()
     PolyCountVisualiser_UI_dialog.show()
@@ -1,30 +1,796 @@
 import shutil
 import os
+import re
+import stat
+import json
+import hashlib
+import tempfile
+import mmap
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import maya.OpenMaya as om
+import maya.api.OpenMaya as om2
 import maya.OpenMaya as omui
 from maya import cmds
-import copy as cp
 
 from  maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 from PySide2 import QtCore, QtGui, QtWidgets
 from shiboken2 import getCppPointer
 import os
 
+class TextureTiles():
+    # Maya filename tokens for UDIM tiles and image sequences
+    TOKEN_RE = re.compile(r"<udim>|<uvtile>|<u>|<v>|<f>|#+|%0?\d*d", re.IGNORECASE)
+    TILE_TOKEN_RE = re.compile(r"<udim>|<uvtile>|<u>|<v>", re.IGNORECASE)
+    FRAME_TOKEN_RE = re.compile(r"<f>|#+|%0?\d*d", re.IGNORECASE)
+    UDIM_RE = re.compile(r"(?<!\d)\d{4}(?!\d)")
+    UV_RE = re.compile(r"u\d+_v\d+")
+    DIGITS_RE = re.compile(r"\d+")
+    # Added to the uvTilingMode value when the file node's useFrameExtension is on
+    FRAME_SEQUENCE = 16
+
+    @classmethod
+    def get_tiling_mode(cls, uv_tiling_mode, use_frame_extension=False):
+        return uv_tiling_mode | (cls.FRAME_SEQUENCE if use_frame_extension else 0)
+
+    @classmethod
+    def has_tokens(cls, filepath):
+        return bool(cls.TOKEN_RE.search(os.path.basename(filepath)))
+
+    @classmethod
+    def get_tile_pattern(cls, filepath, udim_mode=0):
+        # Returns the path with tile tokens, or None if the texture isn't tiled.
+        # udim_mode follows the file node's uvTilingMode (1 ZBrush, 2 Mudbox, 3 UDIM), plus FRAME_SEQUENCE
+        # when useFrameExtension is on. Tokens only count while their mode is on, as Maya reads them literally otherwise.
+        directory, filename = os.path.split(filepath)
+        uv_mode = udim_mode & ~cls.FRAME_SEQUENCE
+        sequence = bool(udim_mode & cls.FRAME_SEQUENCE)
+        if (uv_mode and cls.TILE_TOKEN_RE.search(filename)) or (sequence and cls.FRAME_TOKEN_RE.search(filename)):
+            return filepath
+
+        matches = []
+        if uv_mode == 3:
+            matches = list(cls.UDIM_RE.finditer(filename))
+            token = "<UDIM>"
+        elif uv_mode in (1, 2):
+            matches = list(cls.UV_RE.finditer(filename))
+            token = "u<U>_v<V>" if uv_mode == 1 else "u<u>_v<v>"
+        if not matches and sequence:
+            # Maya swaps the frame into the last number of the name
+            matches = list(cls.DIGITS_RE.finditer(os.path.splitext(filename)[0]))
+            token = "#" * len(matches[-1].group(0)) if matches else ""
+
+        if not matches:
+            return None
+        match = matches[-1]
+        return os.path.join(directory, f"{filename[:match.start()]}{token}{filename[match.end():]}")
+
+    @classmethod
+    def get_regex(cls, filename_pattern, capture_frame=False):
+        # With capture_frame the frame token becomes the regex's only group
+        parts = []
+        position = 0
+        for match in cls.TOKEN_RE.finditer(filename_pattern):
+            parts.append(re.escape(filename_pattern[position:match.start()]))
+            token = match.group(0)
+            if token.lower() == "<udim>":
+                part = r"\d{4}"
+            elif token.lower() == "<uvtile>":
+                part = r"u\d+_v\d+"
+            elif token.startswith("#") and len(token) > 1:
+                part = rf"-?\d{{{len(token)}}}"
+            elif token.startswith("%"):
+                width = token.strip("%0d")
+                part = rf"-?\d{{{width}}}" if width else r"-?\d+"
+            else:
+                part = r"-?\d+"
+            if capture_frame and cls.FRAME_TOKEN_RE.fullmatch(token):
+                part = f"({part})"
+            parts.append(part)
+            position = match.end()
+        parts.append(re.escape(filename_pattern[position:]))
+        return re.compile("".join(parts) + "$", re.IGNORECASE if os.name == "nt" else 0)
+
+    @classmethod
+    def get_missing_frames(cls, tile_paths, filepath_pattern):
+        # Frames absent between the first and last frame on disk. UDIM tiles can be sparse on purpose,
+        # so only image sequences have gaps
+        filename_pattern = os.path.basename(filepath_pattern or "")
+        if not tile_paths or not cls.FRAME_TOKEN_RE.search(filename_pattern):
+            return []
+        regex = cls.get_regex(filename_pattern, capture_frame=True)
+        frames = set()
+        for path in tile_paths:
+            match = regex.match(os.path.basename(path))
+            if match and match.groups():
+                frames.add(int(match.group(1)))
+        if not frames:
+            return []
+        return sorted(set(range(min(frames), max(frames) + 1)).difference(frames))
+
+    @classmethod
+    def get_index_key(cls, filename):
+        # Every digit run collapses to "#" so all tiles of a set share one key
+        return cls.DIGITS_RE.sub("#", filename)
+
+    @classmethod
+    def get_pattern_key(cls, filename_pattern):
+        def replace(match):
+            if match.group(0).lower() == "<uvtile>":
+                return "u#_v#"
+            return "#"
+        return cls.get_index_key(cls.TOKEN_RE.sub(replace, filename_pattern))
+
+
+class TextureIndex():
+    CACHE_VERSION = 1
+
+    def __init__(self, root, cache_path=None):
+        self.root = os.path.normpath(root)
+        self.cache_path = cache_path or self.get_default_cache_path(self.root)
+
+        # directory -> [mtime_ns, filenames, subdirectory names], kept in os.walk order
+        self._directories = {}
+        # filename -> every path with that filename under the root
+        self._files = {}
+        # filename with digit runs collapsed -> paths, for tile and sequence lookups
+        self._sequences = {}
+
+    @staticmethod
+    def get_default_cache_path(root):
+        key = hashlib.md5(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()
+        return os.path.join(tempfile.gettempdir(), "file_repather", f"index_{key}.json")
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != self.CACHE_VERSION or data.get("root") != self.root:
+            return False
+
+        self._directories = data["directories"]
+        self._build_lookup()
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        data = {"version": self.CACHE_VERSION, "root": self.root, "directories": self._directories}
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.cache_path)
+
+    def update(self):
+        # Only directories whose mtime changed since the last scan get listed again
+        directories = {}
+        rescanned = 0
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+            cached = self._directories.get(directory)
+            if cached and cached[0] == mtime:
+                files, subdirs = cached[1], cached[2]
+            else:
+                files, subdirs = self._scan_directory(directory)
+                rescanned += 1
+
+            directories[directory] = [mtime, files, subdirs]
+            stack.extend(os.path.join(directory, subdir) for subdir in reversed(subdirs))
+
+        self._directories = directories
+        self._build_lookup()
+        return rescanned
+
+    def _scan_directory(self, directory):
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, subdirs
+
+    def _build_lookup(self):
+        lookup = {}
+        sequences = {}
+        for directory, (mtime, files, subdirs) in self._directories.items():
+            for filename in files:
+                path = os.path.join(directory, filename)
+                lookup.setdefault(filename, []).append(path)
+                key = TextureTiles.get_index_key(filename)
+                if key != filename:
+                    sequences.setdefault(key, []).append(path)
+        self._files = lookup
+        self._sequences = sequences
+
+    def find(self, filepath):
+        paths = self._files.get(os.path.basename(filepath))
+        if paths:
+            return paths[0]
+
+    def candidates(self, filepath):
+        return list(self._files.get(os.path.basename(filepath), []))
+
+    def find_tiles(self, filepath_pattern):
+        # Returns (directory, tile paths) for the directory holding the most tiles
+        filename_pattern = os.path.basename(filepath_pattern)
+        regex = TextureTiles.get_regex(filename_pattern)
+        by_directory = {}
+        for path in self._sequences.get(TextureTiles.get_pattern_key(filename_pattern), []):
+            if regex.match(os.path.basename(path)):
+                by_directory.setdefault(os.path.dirname(path), []).append(path)
+
+        if not by_directory:
+            return None, []
+        directory = max(by_directory, key=lambda key: len(by_directory[key]))
+        return directory, by_directory[directory]
+
+    def __len__(self):
+        return sum(len(paths) for paths in self._files.values())
+
+
+class TransferEngine():
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, max_workers=None, max_pending=None, journal_path=None):
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 4)
+        # Bounds how many jobs are queued on the pool at once
+        self.max_pending = max_pending or self.max_workers * 4
+        self.journal_path = journal_path
+
+    @staticmethod
+    def get_default_journal_path(destination_directory):
+        key = hashlib.md5(os.path.normcase(os.path.abspath(destination_directory)).encode("utf-8")).hexdigest()
+        return os.path.join(tempfile.gettempdir(), "file_repather", f"transfer_{key}.journal")
+
+    def load_journal(self):
+        completed = set()
+        if not self.journal_path:
+            return completed
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        source, destination = json.loads(line)
+                    except ValueError:
+                        # The last line may be half written if the job was killed
+                        continue
+                    completed.add((source, destination))
+        except OSError:
+            pass
+        return completed
+
+    def clear_journal(self):
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def run(self, jobs, move=False, progress=None):
+        # jobs is a list of (source, destination) file paths. Returns ({destination: source},
+        # {source: error}); progress(done, total, source, destination, error) is called on the
+        # calling thread.
+        jobs = list(jobs)
+        total = len(jobs)
+        completed = self.load_journal()
+        results = {}
+        errors = {}
+        journal = None
+        if self.journal_path:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            journal = open(self.journal_path, "a")
+
+        def handle(futures):
+            for future in futures:
+                source, destination = pending.pop(future)
+                error = future.exception()
+                if error:
+                    errors[source] = error
+                else:
+                    results[destination] = source
+                    if journal:
+                        journal.write(json.dumps([source, destination]) + "\n")
+                        journal.flush()
+                if progress:
+                    progress(len(results) + len(errors), total, source, destination, error)
+
+        pending = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for source, destination in jobs:
+                    if (source, destination) in completed and os.path.isfile(destination):
+                        results[destination] = source
+                        if progress:
+                            progress(len(results) + len(errors), total, source, destination, None)
+                        continue
+
+                    if len(pending) >= self.max_pending:
+                        done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                        handle(done)
+
+                    future = executor.submit(self.transfer_file, source, destination, move)
+                    pending[future] = (source, destination)
+
+                while pending:
+                    done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                    handle(done)
+        finally:
+            if journal:
+                journal.close()
+
+        if not errors:
+            self.clear_journal()
+        return results, errors
+
+    def transfer_file(self, source, destination, move=False):
+        if os.path.normcase(os.path.abspath(source)) == os.path.normcase(os.path.abspath(destination)):
+            return destination
+
+        destination_directory = os.path.dirname(destination)
+        if destination_directory:
+            os.makedirs(destination_directory, exist_ok=True)
+
+        if move:
+            try:
+                os.replace(source, destination)
+                return destination
+            except OSError:
+                # Different device, fall back to copy and delete
+                pass
+
+        # Unique per writer so concurrent jobs copying the same file don't share a temp file
+        temp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.part"
+        self.copy_data(source, temp_path)
+        os.replace(temp_path, destination)
+
+        if move:
+            os.remove(source)
+        return destination
+
+    def copy_data(self, source, destination):
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            size = os.fstat(src.fileno()).st_size
+            if self._copy_zero_copy(src, dst, size):
+                return
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst, self.CHUNK_SIZE)
+
+    def _copy_zero_copy(self, src, dst, size):
+        src_fd = src.fileno()
+        dst_fd = dst.fileno()
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                offset = 0
+                while offset < size:
+                    copied = os.copy_file_range(src_fd, dst_fd, min(self.CHUNK_SIZE, size - offset), offset, offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                if offset == size:
+                    return True
+            except OSError:
+                pass
+
+        if hasattr(os, "sendfile"):
+            try:
+                os.lseek(dst_fd, 0, os.SEEK_SET)
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(dst_fd, src_fd, offset, min(self.CHUNK_SIZE, size - offset))
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset == size:
+                    return True
+            except OSError:
+                pass
+
+        return False
+
+
+class ContentHasher():
+    BUFFER_SIZE = 16 * 1024 * 1024
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(tempfile.gettempdir(), "file_repather", "content_hashes.json")
+        # "path|size|mtime_ns" -> hex digest
+        self._cache = {}
+        self._loaded = False
+
+    def load(self):
+        self._loaded = True
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != self.CACHE_VERSION:
+            return False
+        self._cache.update(data["hashes"])
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": self.CACHE_VERSION, "hashes": self._cache}, f)
+        os.replace(temp_path, self.cache_path)
+
+    def hash_file(self, filepath):
+        if not self._loaded:
+            self.load()
+
+        file_stat = os.stat(filepath)
+        key = f"{os.path.abspath(filepath)}|{file_stat.st_size}|{file_stat.st_mtime_ns}"
+        digest = self._cache.get(key)
+        if digest:
+            return digest
+
+        hasher = hashlib.blake2b(digest_size=20)
+        if file_stat.st_size:
+            with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, file_stat.st_size, self.BUFFER_SIZE):
+                        hasher.update(view[offset:offset + self.BUFFER_SIZE])
+                finally:
+                    view.release()
+
+        digest = hasher.hexdigest()
+        self._cache[key] = digest
+        return digest
+
+    def find_duplicates(self, filepaths):
+        # Returns {filepath: canonical filepath}. Only files that share a size get hashed.
+        by_size = {}
+        for filepath in filepaths:
+            try:
+                by_size.setdefault(os.path.getsize(filepath), []).append(filepath)
+            except OSError:
+                continue
+
+        to_hash = [path for paths in by_size.values() if len(paths) > 1 for path in paths]
+        canonical = {}
+        if not to_hash:
+            return canonical
+
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 4)) as executor:
+            digests = dict(zip(to_hash, executor.map(self._safe_hash, to_hash)))
+
+        first_by_digest = {}
+        for size, paths in by_size.items():
+            for path in paths:
+                digest = digests.get(path)
+                if not digest:
+                    continue
+                first = first_by_digest.setdefault((size, digest), path)
+                if first != path:
+                    canonical[path] = first
+
+        self.save()
+        return canonical
+
+    def _safe_hash(self, filepath):
+        try:
+            return self.hash_file(filepath)
+        except (OSError, ValueError):
+            return None
+
+
+class StatCache():
+
+    def __init__(self, ttl=30.0):
+        self.ttl = ttl
+        # path -> (time checked, os.stat_result or None)
+        self._entries = {}
+        # directory -> (time checked, filenames or None)
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def get_cached(self, filepath):
+        # Returns (True, stat) for a fresh entry, (False, None) if it has to be stat'd
+        with self._lock:
+            entry = self._entries.get(filepath)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return True, entry[1]
+        return False, None
+
+    def stat(self, filepath):
+        found, result = self.get_cached(filepath)
+        if found:
+            return result
+        try:
+            result = os.stat(filepath)
+        except (OSError, ValueError):
+            result = None
+        with self._lock:
+            self._entries[filepath] = (time.monotonic(), result)
+        return result
+
+    def is_file(self, filepath):
+        if not filepath:
+            return False
+        result = self.stat(filepath)
+        return result is not None and stat.S_ISREG(result.st_mode)
+
+    def listdir(self, directory):
+        with self._lock:
+            entry = self._listings.get(directory)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        try:
+            result = os.listdir(directory)
+        except (OSError, ValueError):
+            result = None
+        with self._lock:
+            self._listings[directory] = (time.monotonic(), result)
+        return result
+
+    def invalidate(self, filepaths=None):
+        with self._lock:
+            if filepaths is None:
+                self._entries.clear()
+                self._listings.clear()
+            else:
+                for filepath in filepaths:
+                    self._entries.pop(filepath, None)
+                    self._listings.pop(os.path.dirname(filepath), None)
+
+
+class MayaAsciiRewriter():
+    CHUNK_SIZE = 4 * 1024 * 1024
+    # A file node block bigger than this is passed through untouched
+    MAX_BLOCK_SIZE = 1024 * 1024
+
+    CREATE_NODE_RE = re.compile(rb'^createNode\s+(\S+)\s.*?-n\s+"([^"]+)"')
+    FILE_PATH_RE = re.compile(rb'^(\s*setAttr\s+"\.(?:ftn|fileTextureName)"\s+-type\s+"string"\s+")((?:[^"\\]|\\.)*)(".*)$', re.DOTALL)
+    UV_TILING_RE = re.compile(rb'^\s*setAttr\s+"\.(?:uvt|uvTilingMode)"\s+(\d+)')
+    FRAME_EXTENSION_RE = re.compile(rb'^\s*setAttr\s+"\.(?:ufe|useFrameExtension)"\s+(yes|true|on|1)\b')
+    # Long strings are split over several lines, each continuation starts with + "...
+    CONTINUATION_RE = re.compile(rb'^(\s*\+\s*")((?:[^"\\]|\\.)*)(".*)$', re.DOTALL)
+
+    def __init__(self, repather=None, index=None, only_missing=True):
+        self.repather = repather or File_Repather()
+        self.index = index
+        self.only_missing = only_missing
+
+    @staticmethod
+    def unescape(value):
+        return re.sub(r"\\(.)", lambda match: {"n": "\n", "t": "\t"}.get(match.group(1), match.group(1)), value)
+
+    @staticmethod
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+
+    def get_output_path(self, scene_path):
+        root, ext = os.path.splitext(scene_path)
+        return f"{root}_repathed{ext}"
+
+    def rewrite(self, scene_path, output_path=None, dry_run=False):
+        # Streams the scene in chunks and patches fileTextureName on file nodes.
+        # Only one chunk and the current file node block are held in memory.
+        changes = []
+        output = None
+        temp_path = None
+        if not dry_run:
+            output_path = output_path or self.get_output_path(scene_path)
+            temp_path = f"{output_path}.{os.getpid()}.tmp"
+            output = open(temp_path, "wb")
+
+        write = output.write if output else (lambda data: None)
+        block = None
+        block_size = 0
+
+        def flush_block():
+            if block:
+                for line in self.patch_block(block, changes):
+                    write(line)
+
+        try:
+            with open(scene_path, "rb") as f:
+                remainder = b""
+                while True:
+                    chunk = f.read(self.CHUNK_SIZE)
+                    data = remainder + chunk
+                    lines = data.split(b"\n")
+                    remainder = lines.pop()
+                    if chunk and not lines and len(remainder) > self.MAX_BLOCK_SIZE:
+                        # A huge single line can't be a file path statement, pass it through
+                        flush_block()
+                        block = None
+                        write(remainder)
+                        remainder = b""
+                        continue
+
+                    for line in lines:
+                        line += b"\n"
+                        if block is not None and line[:1] in (b"\t", b" "):
+                            block.append(line)
+                            block_size += len(line)
+                            if block_size > self.MAX_BLOCK_SIZE:
+                                for block_line in block:
+                                    write(block_line)
+                                block = None
+                            continue
+                        if block is not None:
+                            flush_block()
+                            block = None
+
+                        match = self.CREATE_NODE_RE.match(line)
+                        if match and match.group(1) == b"file":
+                            block = [line]
+                            block_size = len(line)
+                        else:
+                            write(line)
+
+                    if not chunk:
+                        break
+
+                flush_block()
+                if remainder:
+                    write(remainder)
+        except BaseException:
+            if output:
+                output.close()
+                os.remove(temp_path)
+            raise
+
+        if output:
+            output.close()
+            os.replace(temp_path, output_path)
+        return changes
+
+    def patch_block(self, block, changes):
+        node_name = self.CREATE_NODE_RE.match(block[0]).group(2).decode("utf-8", "surrogateescape")
+        uv_tiling_mode = 0
+        use_frame_extension = False
+        path_line = None
+        for i, line in enumerate(block):
+            match = self.UV_TILING_RE.match(line)
+            if match:
+                uv_tiling_mode = int(match.group(1))
+            elif self.FRAME_EXTENSION_RE.match(line):
+                use_frame_extension = True
+            elif path_line is None and self.FILE_PATH_RE.match(line):
+                path_line = i
+        udim_mode = TextureTiles.get_tiling_mode(uv_tiling_mode, use_frame_extension)
+
+        if path_line is None:
+            return block
+
+        prefix, value, suffix = self.FILE_PATH_RE.match(block[path_line]).groups()
+        path_end = path_line + 1
+        while path_end < len(block):
+            match = self.CONTINUATION_RE.match(block[path_end])
+            if not match:
+                break
+            value += match.group(2)
+            suffix = match.group(3)
+            path_end += 1
+
+        filepath = self.unescape(value.decode("utf-8", "surrogateescape"))
+        new_path = self.resolve(filepath, udim_mode)
+        if not new_path or new_path == filepath:
+            return block
+
+        changes.append({"node": node_name, "original": filepath, "resolved": new_path})
+        # The new path is written back on a single line, replacing any continuation lines
+        block[path_line:path_end] = [prefix + self.escape(new_path).encode("utf-8", "surrogateescape") + suffix]
+        return block
+
+    def resolve(self, filepath, udim_mode=0):
+        if self.only_missing and self.repather.verify_file(filepath, udim_mode):
+            return None
+        if self.index is None:
+            return None
+        new_path = self.repather.resolve_texture(self.index, filepath, udim_mode)
+        if new_path:
+            # Maya ASCII scenes store forward slashes
+            return new_path.replace("\\", "/")
+
+
+class FileNodeSnapshot():
+
+    def __init__(self):
+        # Parallel columns, one entry per file node
+        self.names = []
+        self.paths = []
+        self.colorspaces = []
+        self.udim_modes = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def rows(self):
+        return zip(self.names, self.paths, self.colorspaces, self.udim_modes)
+
+
+class SceneScanner():
+
+    @classmethod
+    def scan_file_nodes(cls):
+        snapshot = FileNodeSnapshot()
+
+        # Static attributes are shared by every file node, so the plugs can be built
+        # straight from the attribute objects instead of looking them up by name
+        node_class = om2.MNodeClass("file")
+        path_attr = node_class.attribute("fileTextureName")
+        colorspace_attr = node_class.attribute("colorSpace")
+        udim_attr = node_class.attribute("uvTilingMode")
+        frame_extension_attr = node_class.attribute("useFrameExtension")
+
+        fn_node = om2.MFnDependencyNode()
+        iterator = om2.MItDependencyNodes(om2.MFn.kFileTexture)
+        while not iterator.isDone():
+            node = iterator.thisNode()
+            fn_node.setObject(node)
+            if fn_node.typeName == "file":
+                snapshot.names.append(fn_node.name())
+                snapshot.paths.append(om2.MPlug(node, path_attr).asString())
+                snapshot.colorspaces.append(om2.MPlug(node, colorspace_attr).asString())
+                snapshot.udim_modes.append(TextureTiles.get_tiling_mode(om2.MPlug(node, udim_attr).asInt(),
+                                                                        om2.MPlug(node, frame_extension_attr).asBool()))
+            iterator.next()
+
+        return snapshot
+
+
 class File_Repather():
+    # Shared by every repather so the table and batch code reuse each other's stats
+    stat_cache = StatCache()
 
     def __init__(self):
-        pass
+        self._texture_indices = {}
+        self.content_hasher = ContentHasher()
+        self.last_transfer_report = {}
 
     def get_file_nodes_in_scene(self):
-        nodes = []
-        for node in cmds.ls():
-            if cmds.nodeType(node) == "file":
-                nodes.append(node)
-        return nodes
-
-    def verify_file(self, filepath):
-        info = QtCore.QFileInfo(filepath)
-        return info.isFile() and info.exists()
+        return SceneScanner.scan_file_nodes().names
+
+    def get_file_node_snapshot(self):
+        return SceneScanner.scan_file_nodes()
+
+    def verify_file(self, filepath, udim_mode=0):
+        tiles = self.get_tile_paths(filepath, udim_mode)
+        if tiles is None:
+            return self.stat_cache.is_file(filepath)
+        # A sequence with frames missing from its middle doesn't pass just because some frames exist
+        return bool(tiles) and not TextureTiles.get_missing_frames(tiles, TextureTiles.get_tile_pattern(filepath, udim_mode))
+
+    def get_missing_frames(self, filepath, udim_mode=0):
+        tiles = self.get_tile_paths(filepath, udim_mode)
+        return TextureTiles.get_missing_frames(tiles, TextureTiles.get_tile_pattern(filepath, udim_mode))
+
+    def get_tile_paths(self, filepath, udim_mode=0):
+        # Every tile or frame on disk for a tiled texture, from a single directory listing.
+        # Returns None for textures that aren't tiled.
+        pattern = TextureTiles.get_tile_pattern(filepath, udim_mode)
+        if pattern is None:
+            return None
+
+        directory = os.path.dirname(pattern)
+        filenames = self.stat_cache.listdir(directory or ".") or []
+        regex = TextureTiles.get_regex(os.path.basename(pattern))
+        return sorted(os.path.join(directory, filename) for filename in filenames if regex.match(filename))
 
     def get_filepath_attr(self, node):
         return cmds.getAttr(f"{node}.fileTextureName")
@@ -33,153 +799,572 @@ class File_Repather():
         return cmds.setAttr(f"{node}.fileTextureName", filepath, type="string")
 
     def verify_file_list(self, nodes):
+        snapshot = self.get_file_node_snapshot()
+        paths = dict(zip(snapshot.names, snapshot.paths))
+        udim_modes = dict(zip(snapshot.names, snapshot.udim_modes))
         invalid_paths = []
         for node in nodes:
-            if not self.verify_file(self.get_filepath_attr(node)):
+            filepath = paths.get(node)
+            if filepath is None:
+                filepath = self.get_filepath_attr(node)
+            if not self.verify_file(filepath, udim_modes.get(node, 0)):
                 invalid_paths.append(node)
         return invalid_paths
 
 
-    def repath_files(self, node, new_path, directory="", all_paths=False, copy_files=False):
-        filepath = self.get_filepath_attr(node)
-
-        if copy_files:
-            if not directory:
-                output_path = f"{self.get_maya_project_path()}sourceimages"
-            else:
-                output_path = directory
+    def get_destination_path(self, filepath, directory=""):
+        if not directory:
+            directory = f"{self.get_maya_project_path()}sourceimages"
 
-            output_path = self.copy_file(new_path, output_path)
-            self.set_filepath_attr(node, output_path)
-        else:
-            if not directory:
-                output_path = f"{self.get_maya_project_path()}sourceimages"
-            else:
-                output_path = directory
-
-            output_path = self.copy_file(new_path, output_path)
-            self.set_filepath_attr(node, output_path)
-            os.remove(new_path)
+        if os.path.isdir(directory) or directory.endswith(("/", "\\")):
+            return os.path.join(directory, os.path.basename(filepath))
+        return directory
 
+    def repath_files(self, node, new_path, directory="", all_paths=False, copy_files=False):
+        output_path = self.get_destination_path(new_path, directory)
+        self.repath_nodes([(node, new_path, output_path)], copy_files=copy_files)
         return new_path
 
-    def find_missing_textures(self, filepath, directory):
-        filename = os.path.basename(filepath)
-        for root, dirs, files, in os.walk(directory):
-            if filename in files:
-                return os.path.join(root, filename)
+    def repath_nodes(self, jobs, copy_files=True, progress=None, journal_path=None, dedupe=True, udim_modes=None):
+        # jobs is a list of (node, source, destination). Tiled textures are expanded to every
+        # tile on disk, files are transferred on a thread pool and the nodes are repathed
+        # afterwards on the calling thread.
+        if journal_path is None:
+            journal_path = self.get_journal_path()
+        transfer = self.transfer_files(jobs, copy_files=copy_files, progress=progress, journal_path=journal_path,
+                                       dedupe=dedupe, udim_modes=udim_modes)
+        return self.apply_transfer(transfer)
+
+    def get_journal_path(self):
+        # Next to the open scene so an interrupted transfer resumes from the same place, a temp file for untitled scenes
+        scene_path = cmds.file(q=True, sceneName=True)
+        if scene_path:
+            return f"{os.path.splitext(scene_path)[0]}.transfer.journal"
+        return None
+
+    def transfer_files(self, jobs, copy_files=True, progress=None, journal_path=None, dedupe=True, udim_modes=None):
+        # Everything in here only touches files, so the UI runs it off the main thread.
+        # apply_transfer then sets the attributes on the main thread
+        udim_modes = udim_modes or {}
+        node_files = []
+        sources = set()
+        for node, source, destination in jobs:
+            tiles = self.get_tile_paths(source, udim_modes.get(node, 0))
+            if tiles is None:
+                files = [(source, destination)]
+            else:
+                destination_directory = os.path.dirname(destination)
+                files = [(tile, os.path.join(destination_directory, os.path.basename(tile))) for tile in tiles]
+                destination = os.path.join(destination_directory, os.path.basename(source))
+            node_files.append((node, files, destination, tiles is not None))
+            sources.update(file_source for file_source, file_destination in files)
+
+        canonical = {}
+        if copy_files and dedupe:
+            canonical = self.content_hasher.find_duplicates(sources)
+
+        errors = {}
+        transfers = {}
+        first_destination = {}
+        node_targets = []
+        for node, files, destination, tiled in node_files:
+            targets = []
+            for file_source, file_destination in files:
+                key = canonical.get(file_source, file_source)
+                shared = first_destination.get(key)
+                # Tiles have to keep their own filenames, so they can only share an identical destination
+                if shared and (not tiled or shared == file_destination):
+                    targets.append(shared)
+                    continue
+                if transfers.get(file_destination, key) != key:
+                    errors[file_source] = FileExistsError(f"{file_destination} is already the target of {transfers[file_destination]}")
+                    targets = None
+                    break
+                first_destination.setdefault(key, file_destination)
+                transfers[file_destination] = key
+                targets.append(file_destination)
+
+            if not targets:
+                continue
+            if not tiled:
+                destination = targets[0]
+            node_targets.append((node, targets, destination))
+
+        if journal_path is None and transfers:
+            journal_path = TransferEngine.get_default_journal_path(os.path.dirname(next(iter(transfers))))
+        engine = TransferEngine(journal_path=journal_path)
+        start_time = time.time()
+        results, transfer_errors = engine.run([(source, destination) for destination, source in transfers.items()],
+                                              move=not copy_files, progress=progress)
+        elapsed = time.time() - start_time
+        errors.update(transfer_errors)
+        self.stat_cache.invalidate([path for job in transfers.items() for path in job])
+
+        sizes = {}
+        for destination in results:
+            try:
+                sizes[destination] = os.path.getsize(destination)
+            except OSError:
+                sizes[destination] = 0
+
+        return {"node_targets": node_targets,
+                "results": results,
+                "errors": errors,
+                "sizes": sizes,
+                "duplicates": len(canonical),
+                "seconds": elapsed}
+
+    def apply_transfer(self, transfer):
+        # Repaths the nodes whose files all arrived, returns (repathed, errors)
+        results = transfer["results"]
+        sizes = transfer["sizes"]
+        repathed = {}
+        referenced_files = 0
+        referenced_bytes = 0
+        for node, targets, destination in transfer["node_targets"]:
+            if not all(target in results for target in targets):
+                continue
+            self.set_filepath_attr(node, destination)
+            repathed[node] = destination
+            referenced_files += len(targets)
+            referenced_bytes += sum(sizes[target] for target in targets)
+
+        elapsed = transfer["seconds"]
+        copied_bytes = sum(sizes.values())
+        skipped_bytes = max(referenced_bytes - copied_bytes, 0)
+        seconds_per_byte = elapsed / copied_bytes if copied_bytes else 0.0
+        self.last_transfer_report = {"files_transferred": len(results),
+                                     "files_deduplicated": max(referenced_files - len(results), 0),
+                                     "nodes_repathed": len(repathed),
+                                     "duplicates": transfer["duplicates"],
+                                     "bytes_transferred": copied_bytes,
+                                     "bytes_saved": skipped_bytes,
+                                     "seconds": elapsed,
+                                     "seconds_saved": skipped_bytes * seconds_per_byte}
+        return repathed, transfer["errors"]
+
+    def repath_scene(self, index=None, target_directory="", copy_files=True, dry_run=False, journal_path=None):
+        # Resolves missing textures through the index and optionally gathers every texture
+        # into target_directory. Returns a report dict, one entry per file node.
+        snapshot = self.get_file_node_snapshot()
+        nodes = []
+        resolved = {}
+        jobs = []
+        udim_modes = {}
+        for name, path, colorspace, udim_mode in snapshot.rows():
+            entry = {"node": name, "original": path, "resolved": None, "destination": None, "status": "ok"}
+            source = path
+            if not self.verify_file(path, udim_mode):
+                new_path = self.resolve_texture(index, path, udim_mode) if index else None
+                missing_frames = [] if new_path else self.get_missing_frames(path, udim_mode)
+                if new_path:
+                    entry["resolved"] = source = resolved[name] = new_path
+                    entry["status"] = "resolved"
+                elif missing_frames:
+                    # The frames that exist are still gathered, the gaps are reported
+                    entry["status"] = "incomplete"
+                    entry["missing_frames"] = missing_frames
+                else:
+                    entry["status"] = "missing"
+                    nodes.append(entry)
+                    continue
+
+            if target_directory:
+                entry["destination"] = self.get_destination_path(source, target_directory)
+                jobs.append((name, source, entry["destination"]))
+                udim_modes[name] = udim_mode
+            nodes.append(entry)
+
+        report = {"nodes": nodes, "errors": {}, "transfer": {}}
+        if dry_run:
+            return report
+
+        for name, new_path in resolved.items():
+            self.set_filepath_attr(name, new_path)
+
+        if jobs:
+            repathed, errors = self.repath_nodes(jobs, copy_files=copy_files, journal_path=journal_path,
+                                                 udim_modes=udim_modes)
+            for entry in nodes:
+                if entry["destination"] and entry["node"] not in repathed:
+                    entry["status"] = "failed"
+            report["errors"] = {source: str(error) for source, error in errors.items()}
+            report["transfer"] = self.last_transfer_report
+        return report
+
+    def build_texture_index(self, directory):
+        index = self._texture_indices.get(directory)
+        if index is None:
+            index = TextureIndex(directory)
+            index.load()
+            self._texture_indices[directory] = index
+
+        if index.update():
+            index.save()
+        return index
+
+    def get_texture_index(self, directory):
+        index = self._texture_indices.get(directory)
+        if index is None:
+            index = self.build_texture_index(directory)
+        return index
+
+    def resolve_texture(self, index, filepath, udim_mode=0):
+        pattern = TextureTiles.get_tile_pattern(filepath, udim_mode)
+        if pattern is None:
+            return index.find(filepath)
+
+        directory, tiles = index.find_tiles(pattern)
+        if directory:
+            return os.path.join(directory, os.path.basename(filepath))
+
+    def find_missing_textures(self, filepath, directory, udim_mode=0):
+        if not directory or not os.path.isdir(directory):
+            return None
+        return self.resolve_texture(self.get_texture_index(directory), filepath, udim_mode)
 
     def copy_file(self, filepath, destination_directory):
-        filename = os.path.basename(filepath)
-        new_path = destination_directory
-        shutil.copyfile(filepath, new_path)
+        new_path = self.get_destination_path(filepath, destination_directory)
+        TransferEngine().transfer_file(filepath, new_path)
         return new_path
 
     def get_maya_project_path(self):
 
         return cmds.workspace(q=True, rd=True)
 
-class File_Node_Widget(QtWidgets.QWidget):
+class ValidationSignals(QtCore.QObject):
+    # generation, [(row, valid), ...]
+    results_ready = QtCore.Signal(int, list)
 
-    # cb_checked =QtCore.Signal()
-    def __init__(self, name, original_path):
-        super().__init__()
 
-        self.name = str(name)
-        self._original_path = original_path
-        self._is_valid = False
+class TransferSignals(QtCore.QObject):
+    # done, total, source filename
+    progress = QtCore.Signal(int, int, str)
+    # the transfer dict from File_Repather.transfer_files
+    finished = QtCore.Signal(object)
 
-        self.maya_helpers = File_Repather()
-        self.filename = os.path.basename(self.maya_helpers.get_filepath_attr(self.name))
 
-        self.create_widgets()
-        self.create_connections()
-        self.is_valid()
+class TransferTask(QtCore.QRunnable):
 
-    def create_widgets(self):
-        self.select_cb = QtWidgets.QCheckBox("")
-        temp_layout = QtWidgets.QHBoxLayout()
-        temp_layout.addWidget(self.select_cb)
-        temp_layout.setAlignment(QtCore.Qt.AlignCenter)
-        temp_layout.setContentsMargins(0,0,0,0)
-        self.temp_widget = QtWidgets.QLabel("")
-        self.temp_widget.setLayout(temp_layout)
-
-        self.name_label = QtWidgets.QLabel(self.name)
-
-        self.name_label.setMinimumWidth(30)
-        self.name_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.orig_filepath_label = QtWidgets.QLabel(self._original_path)
-        self.new_filepath_label = QtWidgets.QLineEdit("New FilePath")
-        self.open_folder_btn = QtWidgets.QPushButton(QtGui.QIcon(":fileOpen.png"), "")
+    def __init__(self, repather, jobs, copy_files, journal_path, udim_modes, signals):
+        super().__init__()
+        self.repather = repather
+        self.jobs = jobs
+        self.copy_files = copy_files
+        self.journal_path = journal_path
+        self.udim_modes = udim_modes
+        self.signals = signals
+
+    def run(self):
+        try:
+            transfer = self.repather.transfer_files(self.jobs, copy_files=self.copy_files, progress=self.progress,
+                                                    journal_path=self.journal_path, udim_modes=self.udim_modes)
+        except Exception as e:
+            transfer = {"node_targets": [], "results": {}, "errors": {f"{len(self.jobs)} textures": e},
+                        "sizes": {}, "duplicates": 0, "seconds": 0.0}
+        self.signals.finished.emit(transfer)
+
+    def progress(self, done, total, source, destination, error):
+        self.signals.progress.emit(done, total, os.path.basename(source))
+
+
+class ValidationTask(QtCore.QRunnable):
+    BATCH_SIZE = 64
+
+    def __init__(self, generation, rows, paths, udim_modes, verify, signals, cancelled):
+        super().__init__()
+        self.generation = generation
+        self.rows = rows
+        self.paths = paths
+        self.udim_modes = udim_modes
+        self.verify = verify
+        self.signals = signals
+        self.cancelled = cancelled
+
+    def run(self):
+        results = []
+        for row, path, udim_mode in zip(self.rows, self.paths, self.udim_modes):
+            if self.cancelled.is_set():
+                return
+            results.append((row, self.verify(path, udim_mode)))
+            if len(results) >= self.BATCH_SIZE:
+                self.signals.results_ready.emit(self.generation, results)
+                results = []
+        if results:
+            self.signals.results_ready.emit(self.generation, results)
+
+
+class FileNodeTableModel(QtCore.QAbstractTableModel):
+    HEADERS = ["", "Filename", "Orig", "new", "open"]
+    CHECK_COLUMN, NAME_COLUMN, ORIG_COLUMN, NEW_COLUMN, OPEN_COLUMN = range(5)
+
+    INVALID, VALID, PENDING = range(3)
+    VALID_COLOUR = QtGui.QColor(0, 70, 0)
+    INVALID_COLOUR = QtGui.QColor(70, 0, 0)
+    PENDING_COLOUR = QtGui.QColor(50, 50, 50)
+    VALIDATION_CHUNK_SIZE = 256
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.maya_helpers = File_Repather()
 
-    def create_connections(self):
-        # self.select_cb.toggled.connect(lambda: self.cb_checked.emit())
-        self.select_cb.toggled.connect(print)
-        self.open_folder_btn.clicked.connect(self.open_file_menu)
-
-    def change_bg_colour_selection(self, checked):
-        palette = self.palette()
-        if checked:
-            print("checked")
-            colour= QtGui.QColor(128, 128, 128)
+        # One entry per file node, stored column-wise to keep rows cheap
+        self.names = []
+        self.original_paths = []
+        self.new_paths = []
+        self.udim_modes = bytearray()
+        self.checked = bytearray()
+        self.valid = bytearray()
+
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(8)
+        self.validation_signals = ValidationSignals(self)
+        self.validation_signals.results_ready.connect(self.on_validation_results)
+        self._generation = 0
+        self._cancelled = threading.Event()
+
+    def set_snapshot(self, snapshot):
+        self.set_nodes(snapshot.names, snapshot.paths, snapshot.udim_modes)
+
+    def set_nodes(self, names, original_paths, udim_modes=None):
+        self.beginResetModel()
+        self.names = list(names)
+        self.original_paths = list(original_paths)
+        self.udim_modes = bytearray(udim_modes) if udim_modes else bytearray(len(self.names))
+        self.new_paths = [""] * len(self.names)
+        self.checked = bytearray(len(self.names))
+        self.valid = bytearray([self.PENDING]) * len(self.names)
+        self.endResetModel()
+        self.validate()
+
+    def validate(self):
+        # Fresh stat cache hits are applied immediately, the rest are checked on the pool
+        self._cancelled.set()
+        self._cancelled = threading.Event()
+        self._generation += 1
+
+        stat_cache = self.maya_helpers.stat_cache
+        rows = []
+        paths = []
+        for row, path in enumerate(self.original_paths):
+            if TextureTiles.get_tile_pattern(path, self.udim_modes[row]) is None:
+                found, result = stat_cache.get_cached(path)
+            else:
+                found = False
+            if found:
+                self.valid[row] = self.VALID if result is not None and stat.S_ISREG(result.st_mode) else self.INVALID
+            else:
+                self.valid[row] = self.PENDING
+                rows.append(row)
+                paths.append(path)
+
+        if self.names:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.names) - 1, len(self.HEADERS) - 1),
+                                  [QtCore.Qt.BackgroundRole])
+
+        for start in range(0, len(rows), self.VALIDATION_CHUNK_SIZE):
+            end = start + self.VALIDATION_CHUNK_SIZE
+            task = ValidationTask(self._generation, rows[start:end], paths[start:end],
+                                  [self.udim_modes[row] for row in rows[start:end]], self.maya_helpers.verify_file,
+                                  self.validation_signals, self._cancelled)
+            self.thread_pool.start(task)
+
+    def on_validation_results(self, generation, results):
+        if generation != self._generation:
+            return
+        first_row = len(self.names)
+        last_row = -1
+        for row, valid in results:
+            self.valid[row] = self.VALID if valid else self.INVALID
+            first_row = min(first_row, row)
+            last_row = max(last_row, row)
+        if last_row >= 0:
+            self.dataChanged.emit(self.index(first_row, 0), self.index(last_row, len(self.HEADERS) - 1),
+                                  [QtCore.Qt.BackgroundRole])
+
+    def is_valid(self, row):
+        if self.valid[row] == self.PENDING:
+            self.valid[row] = self.VALID if self.maya_helpers.verify_file(self.original_paths[row], self.udim_modes[row]) else self.INVALID
+        return self.valid[row] == self.VALID
+
+    def clear(self):
+        self.set_nodes([], [])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.names)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == self.NAME_COLUMN:
+                return self.names[row]
+            if column == self.ORIG_COLUMN:
+                return self.original_paths[row]
+            if column == self.NEW_COLUMN:
+                return self.new_paths[row] or "New FilePath"
+        elif role == QtCore.Qt.EditRole:
+            if column == self.NEW_COLUMN:
+                return self.new_paths[row]
+        elif role == QtCore.Qt.CheckStateRole:
+            if column == self.CHECK_COLUMN:
+                return QtCore.Qt.Checked if self.checked[row] else QtCore.Qt.Unchecked
+        elif role == QtCore.Qt.BackgroundRole:
+            if self.valid[row] == self.PENDING:
+                return self.PENDING_COLOUR
+            return self.VALID_COLOUR if self.valid[row] == self.VALID else self.INVALID_COLOUR
+        elif role == QtCore.Qt.ToolTipRole:
+            if column == self.ORIG_COLUMN:
+                return self.original_paths[row]
+            if column == self.NEW_COLUMN:
+                return self.new_paths[row]
+        elif role == QtCore.Qt.TextAlignmentRole:
+            if column == self.NAME_COLUMN:
+                return QtCore.Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid():
+            return False
+        row = index.row()
+        column = index.column()
+
+        if role == QtCore.Qt.CheckStateRole and column == self.CHECK_COLUMN:
+            self.checked[row] = 1 if value == QtCore.Qt.Checked else 0
+        elif role == QtCore.Qt.EditRole and column == self.NEW_COLUMN:
+            self.new_paths[row] = value
+        else:
+            return False
+
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == self.CHECK_COLUMN:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        elif index.column() == self.NEW_COLUMN:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def set_all_checked(self, checked):
+        if not self.names:
+            return
+        self.checked = bytearray([1 if checked else 0]) * len(self.names)
+        self.dataChanged.emit(self.index(0, self.CHECK_COLUMN), self.index(len(self.names) - 1, self.CHECK_COLUMN),
+                              [QtCore.Qt.CheckStateRole])
+
+    def set_new_directory(self, directory):
+        if not self.names:
+            return
+        self.new_paths = [os.path.join(directory, os.path.basename(path)) for path in self.original_paths]
+        self.dataChanged.emit(self.index(0, self.NEW_COLUMN), self.index(len(self.names) - 1, self.NEW_COLUMN))
+
+
+class CheckBoxDelegate(QtWidgets.QStyledItemDelegate):
+
+    def _check_box_rect(self, option):
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        check_option = QtWidgets.QStyleOptionButton()
+        rect = style.subElementRect(QtWidgets.QStyle.SE_CheckBoxIndicator, check_option, option.widget)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        painter.fillRect(option.rect, index.data(QtCore.Qt.BackgroundRole))
+
+        check_option = QtWidgets.QStyleOptionButton()
+        check_option.rect = self._check_box_rect(option)
+        check_option.state = QtWidgets.QStyle.State_Enabled
+        if index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked:
+            check_option.state |= QtWidgets.QStyle.State_On
         else:
-            print("unchecked")
-            colour= QtGui.QColor(255, 255, 255)
-        palette.setColor(QtGui.QPalette.Window, colour)
-        self.setPalette(palette)
-        self.setAutoFillBackground(True)
+            check_option.state |= QtWidgets.QStyle.State_Off
 
-    def set_name_label_width(self, width):
-        self.name_label.setFixedWidth(width)
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.CE_CheckBox, check_option, painter, option.widget)
 
-    def set_orig_filepath_label_width(self, width):
-        self.orig_filepath_label.setFixedWidth(width)
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
+            if self._check_box_rect(option).contains(event.pos()):
+                checked = index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+                model.setData(index, QtCore.Qt.Unchecked if checked else QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+                return True
+        return False
 
-    def set_new_filepath_label_width(self, width):
-        self.new_filepath_label.setFixedWidth(width)
 
-    def open_file_menu(self):
-        location = QtWidgets.QFileDialog.getOpenFileName()
-        location = location[0]
-        self.new_filepath_label.setText(location)
-        return location
+class OpenButtonDelegate(QtWidgets.QStyledItemDelegate):
 
-    def is_valid(self):
-        info = QtCore.QFileInfo(self._original_path)
-        if info.exists() and info.isFile():
-            self._is_valid=True
-        else:
-            self._is_valid=False
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon = QtGui.QIcon(":fileOpen.png")
 
-        return self._is_valid
+    def paint(self, painter, option, index):
+        button_option = QtWidgets.QStyleOptionButton()
+        button_option.rect = option.rect
+        button_option.icon = self.icon
+        button_option.iconSize = QtCore.QSize(16, 16)
+        button_option.state = QtWidgets.QStyle.State_Enabled | QtWidgets.QStyle.State_Raised
 
-class TableWidget(QtWidgets.QTableWidget):
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.CE_PushButton, button_option, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
+            location = QtWidgets.QFileDialog.getOpenFileName()[0]
+            if location:
+                model.setData(model.index(index.row(), FileNodeTableModel.NEW_COLUMN), location)
+            return True
+        return False
+
+
+class FileNodeTableView(QtWidgets.QTableView):
 
     def __init__(self):
         super().__init__()
         self.column_widths = [ 5, 100, 150, 150, 20]
-        self.file_node_list = []
-        self.current_row = 0
+
+        self.file_node_model = FileNodeTableModel(self)
+        self.setModel(self.file_node_model)
 
         self.setContentsMargins(120, 10, 10, 10)
-        self.setColumnCount(5)
-        self.setRowCount(0)
         self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked | QtWidgets.QAbstractItemView.EditKeyPressed)
+
+        self.check_box_delegate = CheckBoxDelegate(self)
+        self.open_button_delegate = OpenButtonDelegate(self)
+        self.setItemDelegateForColumn(FileNodeTableModel.CHECK_COLUMN, self.check_box_delegate)
+        self.setItemDelegateForColumn(FileNodeTableModel.OPEN_COLUMN, self.open_button_delegate)
 
         self.create_widgets()
 
     def create_widgets(self):
-
-
-        header_view = QtWidgets.QHeaderView(QtCore.Qt.Horizontal, self)
-        self.setHorizontalHeader(header_view)
-        self.setHorizontalHeaderLabels(["", "Filename", "Orig", "new", "open"])
+        header_view = self.horizontalHeader()
         header_view.setSectionResizeMode(0, QtWidgets.QHeaderView.Fixed)
         header_view.setSectionResizeMode(4, QtWidgets.QHeaderView.Fixed)
-        header_vertical_view = QtWidgets.QHeaderView(QtCore.Qt.Vertical, self)
-        header_vertical_view.setHidden(True)
-        self.setVerticalHeader(header_vertical_view)
+        header_view.setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
+        header_view.setSectionResizeMode(3, QtWidgets.QHeaderView.Stretch)
+        self.verticalHeader().setHidden(True)
+        # Uniform row heights let the view skip measuring every row
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
 
         header_view_cb_temp_layout = QtWidgets.QHBoxLayout()
         temp_widget = QtWidgets.QWidget(self)
@@ -190,56 +1375,14 @@ class TableWidget(QtWidgets.QTableWidget):
         header_view_cb_temp_layout.setContentsMargins(12, 8, 0,0)
         self.header_cb.stateChanged.connect(self.select_all)
 
-        header_view.setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
-        header_view.setSectionResizeMode(3, QtWidgets.QHeaderView.Stretch)
-
-
-        # self.header_cb.setGeometry(QtCore.QRect(10, 0, 0, 0))
-
         for j in range(0, 5):
             self.setColumnWidth(j, self.column_widths[j])
 
-
-    def add_row(self, name, original_path):
-        self.setRowCount(self.current_row+1)
-        widg = File_Node_Widget(name, original_path)
-
-        self.file_node_list.append(widg)
-        for j in range(0, 5):
-            self.setItem(self.current_row, j, QtWidgets.QTableWidgetItem(" "))
-            if widg.is_valid():
-                self.item(self.current_row, j).setBackground(QtGui.QColor(0, 70, 0))
-            else:
-                self.item(self.current_row, j).setBackground(QtGui.QColor(70, 0, 0))
-
-        self.setCellWidget(self.current_row, 0, widg.temp_widget)
-        self.setCellWidget(self.current_row, 1, widg.name_label)
-        self.setCellWidget(self.current_row, 2, widg.orig_filepath_label)
-        self.setCellWidget(self.current_row, 3, widg.new_filepath_label)
-        self.setCellWidget(self.current_row, 4, widg.open_folder_btn)
-        self.current_row +=1
-        # widg.cb_checked.connect(self.check_box_state_changed)
-
-    def check_box_state_changed(self, *args):
-        # for i in self.file_node_list:
-        #     if i.select_cb.isChecked():
-        #         print("checked")
-        #     else:
-        print(args)
-        pass
-
     def select_all(self):
-        if self.header_cb.isChecked():
-            for each in self.file_node_list:
-                each.select_cb.setChecked(True)
-        else:
-            for each in self.file_node_list:
-                each.select_cb.setChecked(False)
+        self.file_node_model.set_all_checked(self.header_cb.isChecked())
 
     def clear_table(self):
-        self.file_node_list = []
-        self.current_row=0
-        self.setRowCount(0)
+        self.file_node_model.clear()
 
 class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     TITLE = "File Repather UI"
@@ -260,6 +1403,12 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
 
         self.maya_helpers = File_Repather()
+        # Transfers run one at a time off the main thread, the nodes are repathed when they finish
+        self.transfer_pool = QtCore.QThreadPool(self)
+        self.transfer_pool.setMaxThreadCount(1)
+        self.transfer_signals = TransferSignals()
+        self.transfer_signals.progress.connect(self.transfer_progress)
+        self.transfer_signals.finished.connect(self.transfer_finished)
         self.create_widgets()
         self.create_layouts()
         self.create_connections()
@@ -276,7 +1425,10 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.directory_update_btn.setToolTip("Udpates the file paths with found textueres")
 
 
-        self.table_widget = TableWidget()
+        self.table_view = FileNodeTableView()
+
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setVisible(False)
 
         self.new_filepath_le = QtWidgets.QLineEdit()
         self.new_filepath_le.setPlaceholderText("Set Directory yo Copy or move to")
@@ -324,7 +1476,8 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
 
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.addLayout(options_layout)
-        main_layout.addWidget(self.table_widget)
+        main_layout.addWidget(self.table_view)
+        main_layout.addWidget(self.progress_bar)
         main_layout.addLayout(new_filepath_layoput)
         main_layout.addLayout(button_layout)
 
@@ -347,11 +1500,9 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.move_btn.clicked.connect(self.move_textures)
 
     def refresh(self):
-        self.table_widget.clear_table()
-        nodes = self.maya_helpers.get_file_nodes_in_scene()
-        for node in nodes:
-            # print(self.maya_helpers.get_filepath_attr(node) )
-            self.table_widget.add_row(node,self.maya_helpers.get_filepath_attr(node) )
+        snapshot = self.maya_helpers.get_file_node_snapshot()
+        self.table_view.file_node_model.set_snapshot(snapshot)
+        self.update_file_paths()
 
     def open_file_menu_filepath(self):
         location = QtWidgets.QFileDialog.getExistingDirectory(self, 'Select Folder')
@@ -366,25 +1517,23 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         return location
 
 
-    def change_table_widget_length(self, *args):
-        print(args)
-
     def update_file_paths(self):
         text = self.new_filepath_le.text()
-        for i in self.table_widget.file_node_list:
-            i.new_filepath_label.setText(os.path.join(text, i.filename))
+        if text:
+            self.table_view.file_node_model.set_new_directory(text)
 
 
     def update_directory_file_paths(self):
         text = self.directory_le.text()
+        if not text or not os.path.isdir(text):
+            return
 
-        for i in self.table_widget.file_node_list:
-            new_filepath = self.maya_helpers.find_missing_textures(i.orig_filepath_label.text(), text)
-            # i.new_filepath_label.setText(new_filepath)
+        index = self.maya_helpers.build_texture_index(text)
+        model = self.table_view.file_node_model
+        for name, original_path, udim_mode in zip(model.names, model.original_paths, model.udim_modes):
+            new_filepath = self.maya_helpers.resolve_texture(index, original_path, udim_mode)
             if new_filepath:
-                # print(i.name+"."+new_filepath)
-                if (i.is_valid):
-                    self.maya_helpers.set_filepath_attr(i.name, new_filepath)
+                self.maya_helpers.set_filepath_attr(name, new_filepath)
         self.refresh()
 
     def copy_textures(self):
@@ -396,47 +1545,65 @@ class File_Repather_UI(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     def repath_texture(self, copy=False):
 
         text = self.new_filepath_le.text()
-        # print(text)
         info = QtCore.QFileInfo(text)
-        for node in self.table_widget.file_node_list:
-            new_dir = node.new_filepath_label.text()
-            old_dir = node.orig_filepath_label.text()
-            temp_old_dir = cp.deepcopy(old_dir)
-            if copy:
-                if node._is_valid:
-                    if info.isDir():
-                        self.maya_helpers.repath_files(node.name, old_dir, directory=new_dir, all_paths=False, copy_files=copy)
-                    else:
-                        self.maya_helpers.repath_files(node.name, old_dir,"", False, copy_files=copy)
+        model = self.table_view.file_node_model
+        jobs = []
+        for row, name in enumerate(model.names):
+            if not model.is_valid(row):
+                continue
+            old_dir = model.original_paths[row]
+            if info.isDir():
+                new_dir = model.new_paths[row]
             else:
-                if node._is_valid:
-                    if info.isDir():
-                        self.maya_helpers.repath_files(node.name, old_dir, directory=new_dir, all_paths=False, copy_files=copy)
-                    else:
-                        self.maya_helpers.repath_files(node.name, old_dir,"", False, copy_files=copy)
-
-            self.refresh()
+                new_dir = ""
+            jobs.append((name, old_dir, self.maya_helpers.get_destination_path(old_dir, new_dir)))
+
+        if not jobs:
+            return
+
+        self.progress_bar.setRange(0, len(jobs))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.copy_btn.setEnabled(False)
+        self.move_btn.setEnabled(False)
+        udim_modes = dict(zip(model.names, model.udim_modes))
+        self.transfer_pool.start(TransferTask(self.maya_helpers, jobs, copy, self.maya_helpers.get_journal_path(),
+                                              udim_modes, self.transfer_signals))
+
+    def transfer_finished(self, transfer):
+        self.progress_bar.setVisible(False)
+        self.copy_btn.setEnabled(True)
+        self.move_btn.setEnabled(True)
+        repathed, errors = self.maya_helpers.apply_transfer(transfer)
+
+        for source, error in errors.items():
+            om.MGlobal.displayWarning(f"Could not transfer {source}: {error}")
+
+        report = self.maya_helpers.last_transfer_report
+        if report.get("bytes_saved"):
+            om.MGlobal.displayInfo(f"Deduplicated {report['files_deduplicated']} textures, "
+                                   f"saved {report['bytes_saved'] / (1024 * 1024):.1f} MB "
+                                   f"and about {report['seconds_saved']:.1f}s of copying")
 
-try:
-    if window and window.parent():
-        workspace_control_name = window.parent().objectName()
-        if cmds.window(workspace_control_name, exists=True):
-            cmds.deleteUI(workspace_control_name)
-except:
-    pass
-
-window = File_Repather_UI()
-# DEelete late
-
-window.refresh()
-window.directory_le.setText(r"C:\Users\vboxuser\Desktop\BugsMaya\sourceimages")
-window.new_filepath_le.setText(r"C:/Users/vboxuser/Desktop/BugsMaya/sourceimages/ee")
-window.update_file_paths()
+        self.refresh()
 
+    def transfer_progress(self, done, total, filename):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"%v / %m  {filename}")
 
+if __name__ == "__main__":
 
-#  DE;ete LAter
+    try:
+        if window and window.parent():
+            workspace_control_name = window.parent().objectName()
+            if cmds.window(workspace_control_name, exists=True):
+                cmds.deleteUI(workspace_control_name)
+    except:
+        pass
 
-ui_script = "from file_repather import File_Repather_UI\nwindow=File_Repather_UI"
-window.show(dockable=True, uiScript=ui_script)
+    window = File_Repather_UI()
+    window.refresh()
 
+    ui_script = "from file_repather import File_Repather_UI\nwindow=File_Repather_UI()"
+    window.show(dockable=True, uiScript=ui_script)
@@ -0,0 +1,185 @@
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+# Run with mayapy:
+#   mayapy file_repather_batch.py "X:/show/ep01/**/*.ma" --search-root X:/textures --target X:/show/sourceimages
+
+_worker = {}
+
+
+def init_worker(search_root, index_cache_path, standalone=True):
+    if standalone:
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+
+    from file_repather import File_Repather, TextureIndex
+
+    repather = File_Repather()
+    index = None
+    if search_root:
+        # Every worker shares the index the parent built instead of walking the root again
+        index = TextureIndex(search_root, cache_path=index_cache_path)
+        index.load()
+        repather._texture_indices[search_root] = index
+
+    _worker["repather"] = repather
+    _worker["index"] = index
+
+
+def get_report_path(report_directory, scene):
+    key = hashlib.md5(os.path.abspath(scene).encode("utf-8")).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(scene))[0]
+    return os.path.join(report_directory, f"{name}_{key}.json")
+
+
+def process_scene(task):
+    scene, options = task
+
+    start_time = time.time()
+    report_path = get_report_path(options["report_directory"], scene)
+    report = {"scene": scene, "status": "ok"}
+    try:
+        if options["ascii"]:
+            report.update(rewrite_ascii_scene(scene, options))
+        else:
+            from maya import cmds
+            cmds.file(scene, open=True, force=True, prompt=False)
+            result = _worker["repather"].repath_scene(index=_worker["index"],
+                                                      target_directory=options["target"],
+                                                      copy_files=not options["move"],
+                                                      dry_run=options["dry_run"],
+                                                      journal_path=f"{os.path.splitext(report_path)[0]}.journal")
+            report.update(result)
+            if not options["dry_run"]:
+                cmds.file(save=True, force=True)
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+
+    report["seconds"] = time.time() - start_time
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
+
+    statuses = [entry["status"] for entry in report.get("nodes", [])]
+    return {"scene": scene,
+            "status": report["status"],
+            "report": report_path,
+            "resolved": statuses.count("resolved"),
+            "missing": statuses.count("missing"),
+            "incomplete": statuses.count("incomplete"),
+            "failed": statuses.count("failed"),
+            "seconds": report["seconds"]}
+
+
+def rewrite_ascii_scene(scene, options):
+    # Patches the .ma text directly instead of opening the scene
+    from file_repather import MayaAsciiRewriter
+
+    rewriter = MayaAsciiRewriter(repather=_worker["repather"], index=_worker["index"])
+    output_path = rewriter.get_output_path(scene)
+    if options["in_place"]:
+        # The untouched scene is kept next to the rewritten one
+        output_path = scene
+        if not options["dry_run"]:
+            shutil.copy2(scene, f"{scene}.bak")
+    changes = rewriter.rewrite(scene, output_path=output_path, dry_run=options["dry_run"])
+    nodes = [{"node": change["node"], "original": change["original"], "resolved": change["resolved"],
+              "destination": None, "status": "resolved"} for change in changes]
+    return {"output": output_path, "nodes": nodes, "errors": {}, "transfer": {}}
+
+
+def expand_scenes(patterns):
+    scenes = []
+    seen = set()
+    for pattern in patterns:
+        for scene in sorted(glob.glob(pattern, recursive=True)):
+            if scene.lower().endswith((".ma", ".mb")) and scene not in seen:
+                seen.add(scene)
+                scenes.append(scene)
+    return scenes
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Repath file textures across many Maya scenes with mayapy.")
+    parser.add_argument("scenes", nargs="+", help="Scene files or glob patterns, ** is supported")
+    parser.add_argument("--search-root", default="", help="Directory searched for missing textures")
+    parser.add_argument("--target", default="", help="Directory every texture is copied or moved into")
+    parser.add_argument("--report-dir", default="", help="Directory for the per scene JSON reports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of mayapy processes")
+    parser.add_argument("--move", action="store_true", help="Move textures instead of copying them")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without saving")
+    parser.add_argument("--ascii", action="store_true",
+                        help="Rewrite .ma files as text without opening them in Maya, only resolves missing textures")
+    parser.add_argument("--in-place", action="store_true",
+                        help="With --ascii, overwrite each scene and keep the original as <scene>.bak "
+                             "instead of writing <scene>_repathed.ma")
+    parser.add_argument("--mayapy", default=sys.executable, help="Interpreter used for the worker processes")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    from file_repather import TextureIndex
+
+    scenes = expand_scenes(args.scenes)
+    if args.ascii:
+        if args.target:
+            print("--target can't be used with --ascii")
+            return 1
+        scenes = [scene for scene in scenes if scene.lower().endswith(".ma")]
+    elif args.in_place:
+        print("--in-place can only be used with --ascii")
+        return 1
+    if not scenes:
+        print("No scenes found")
+        return 1
+
+    report_directory = args.report_dir or os.path.join(os.getcwd(), "repath_reports")
+    os.makedirs(report_directory, exist_ok=True)
+    if args.target:
+        os.makedirs(args.target, exist_ok=True)
+
+    index_cache_path = None
+    if args.search_root:
+        index = TextureIndex(args.search_root)
+        index.load()
+        if index.update() or not os.path.exists(index.cache_path):
+            index.save()
+        index_cache_path = index.cache_path
+        print(f"Indexed {len(index)} files under {args.search_root}")
+
+    options = {"target": args.target,
+               "move": args.move,
+               "dry_run": args.dry_run,
+               "ascii": args.ascii,
+               "in_place": args.in_place,
+               "report_directory": report_directory}
+
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(args.mayapy)
+    workers = max(1, min(args.workers, len(scenes)))
+
+    start_time = time.time()
+    summary = []
+    with context.Pool(processes=workers, initializer=init_worker, initargs=(args.search_root, index_cache_path, not args.ascii)) as pool:
+        for result in pool.imap_unordered(process_scene, [(scene, options) for scene in scenes]):
+            summary.append(result)
+            print(f"[{len(summary)}/{len(scenes)}] {result['status']:5} {result['scene']} "
+                  f"resolved={result['resolved']} missing={result['missing']} incomplete={result['incomplete']} "
+                  f"failed={result['failed']} ({result['seconds']:.1f}s)")
+
+    with open(os.path.join(report_directory, "summary.json"), "w") as f:
+        json.dump({"scenes": summary, "seconds": time.time() - start_time}, f, indent=4)
+
+    return 0 if all(result["status"] == "ok" for result in summary) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
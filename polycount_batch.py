@@ -0,0 +1,252 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Run with mayapy:
+#   mayapy polycount_batch.py "X:/library/**/*.mb" --output X:/qc/polycounts.csv
+
+# Bumped whenever the cached columns change so older cache files are ignored
+CACHE_VERSION = 2
+MESH_COLUMNS = ["mesh", "parent", "path", "shape", "vertices", "edges", "faces", "triangles"]
+
+
+def init_worker():
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+
+def get_default_cache_directory():
+    return os.path.join(tempfile.gettempdir(), "polycount_batch")
+
+
+def get_cache_path(cache_directory, scene_hash):
+    return os.path.join(cache_directory, f"{scene_hash}_v{CACHE_VERSION}.csv")
+
+
+def get_manifest_path(cache_directory, scene_hash):
+    return os.path.join(cache_directory, f"{scene_hash}_v{CACHE_VERSION}.json")
+
+
+def stat_dependency(path):
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return [path, None, None]
+    return [path, file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def get_scene_dependencies():
+    # Every loaded reference at any depth, the counts include their meshes
+    from maya import cmds
+
+    paths = set()
+    for reference_node in cmds.ls(type="reference") or []:
+        if reference_node == "sharedReferenceNode" or reference_node.endswith(":sharedReferenceNode"):
+            continue
+        try:
+            paths.add(cmds.referenceQuery(reference_node, filename=True, withoutCopyNumber=True))
+        except RuntimeError:
+            continue
+    return [stat_dependency(path) for path in sorted(paths)]
+
+
+def is_cache_valid(cache_directory, scene_hash):
+    # The scene hash doesn't cover referenced files, so their size and mtime are checked too
+    if not os.path.exists(get_cache_path(cache_directory, scene_hash)):
+        return False
+    try:
+        with open(get_manifest_path(cache_directory, scene_hash), "r") as f:
+            dependencies = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return all(stat_dependency(dependency[0]) == dependency for dependency in dependencies)
+
+
+def hash_scene(scene):
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(scene, "rb") as f:
+        for chunk in iter(lambda: f.read(16 * 1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class SceneHashCache:
+    def __init__(self, cache_directory):
+        self.cache_path = os.path.join(cache_directory, "scene_hashes.json")
+        self.entries = {}
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        temp_path = f"{self.cache_path}.{os.getpid()}.part"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.cache_path)
+
+    def get_key(self, scene):
+        file_stat = os.stat(scene)
+        return f"{os.path.abspath(scene)}|{file_stat.st_size}|{file_stat.st_mtime_ns}"
+
+    def hash_scenes(self, scenes, workers=8):
+        # Only scenes whose size or mtime moved are read again
+        keys = {scene: self.get_key(scene) for scene in scenes}
+        stale = [scene for scene in scenes if keys[scene] not in self.entries]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for scene, scene_hash in zip(stale, executor.map(hash_scene, stale)):
+                self.entries[keys[scene]] = scene_hash
+
+        # Older entries for these scenes are dropped, entries from other runs are kept while the file exists
+        live_keys = set(keys.values())
+        scene_paths = {os.path.abspath(scene) for scene in scenes}
+        self.entries = {key: value for key, value in self.entries.items()
+                        if key in live_keys or (key.rsplit("|", 2)[0] not in scene_paths
+                                                and os.path.exists(key.rsplit("|", 2)[0]))}
+        return {scene: self.entries[keys[scene]] for scene in scenes}
+
+
+def process_scene(task):
+    scene, scene_hash, cache_directory = task
+
+    start_time = time.time()
+    result = {"scene": scene, "hash": scene_hash, "status": "ok", "meshes": 0}
+    try:
+        from maya import cmds
+        from PolyCountChecker import PolyCountCollector
+
+        cmds.file(scene, open=True, force=True, prompt=False, loadReferenceDepth="all")
+        # An empty node list counts the whole scene rather than whatever was saved selected
+        counts = PolyCountCollector.collect([])
+
+        cache_path = get_cache_path(cache_directory, scene_hash)
+        temp_path = f"{cache_path}.{os.getpid()}.part"
+        with open(temp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(MESH_COLUMNS)
+            writer.writerows(zip(counts["name"], counts["parent"], counts["path"], counts["shape"],
+                                 counts["v"].tolist(), counts["e"].tolist(),
+                                 counts["f"].tolist(), counts["t"].tolist()))
+        os.replace(temp_path, cache_path)
+
+        manifest_path = get_manifest_path(cache_directory, scene_hash)
+        temp_path = f"{manifest_path}.{os.getpid()}.part"
+        with open(temp_path, "w") as f:
+            json.dump(get_scene_dependencies(), f)
+        os.replace(temp_path, manifest_path)
+        result["meshes"] = len(counts)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    result["seconds"] = time.time() - start_time
+    return result
+
+
+def write_report(output_path, scenes, scene_hashes, cache_directory):
+    # One row per mesh, the cached per scene tables are streamed into a single file
+    temp_path = f"{output_path}.{os.getpid()}.part"
+    with open(temp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["scene", "scene_hash"] + MESH_COLUMNS)
+        for scene in scenes:
+            scene_hash = scene_hashes[scene]
+            cache_path = get_cache_path(cache_directory, scene_hash)
+            if not os.path.exists(cache_path):
+                continue
+            with open(cache_path, "r", newline="") as cache_file:
+                reader = csv.reader(cache_file)
+                next(reader, None)
+                for row in reader:
+                    writer.writerow([scene, scene_hash] + row)
+    os.replace(temp_path, output_path)
+
+
+def expand_scenes(patterns):
+    scenes = []
+    seen = set()
+    for pattern in patterns:
+        for scene in sorted(glob.glob(pattern, recursive=True)):
+            if scene.lower().endswith((".ma", ".mb")) and scene not in seen:
+                seen.add(scene)
+                scenes.append(scene)
+    return scenes
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Write per mesh poly counts for many Maya scenes with mayapy.")
+    parser.add_argument("scenes", nargs="+", help="Scene files or glob patterns, ** is supported")
+    parser.add_argument("--output", default="polycounts.csv", help="CSV file with one row per mesh")
+    parser.add_argument("--cache-dir", default=get_default_cache_directory(),
+                        help="Directory holding the cached counts of every scene hash")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of mayapy processes")
+    parser.add_argument("--force", action="store_true",
+                        help="Count every scene even if its hash and referenced files are unchanged")
+    parser.add_argument("--mayapy", default=sys.executable, help="Interpreter used for the worker processes")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    scenes = expand_scenes(args.scenes)
+    if not scenes:
+        print("No scenes found")
+        return 1
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    output_directory = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_directory, exist_ok=True)
+
+    start_time = time.time()
+    hash_cache = SceneHashCache(args.cache_dir)
+    hash_cache.load()
+    scene_hashes = hash_cache.hash_scenes(scenes)
+    hash_cache.save()
+
+    # Copies of the same scene share a hash, so they are only opened once
+    pending = {}
+    for scene in scenes:
+        scene_hash = scene_hashes[scene]
+        if args.force or not is_cache_valid(args.cache_dir, scene_hash):
+            pending.setdefault(scene_hash, scene)
+    cached = sum(1 for scene in scenes if scene_hashes[scene] not in pending)
+    print(f"{cached} of {len(scenes)} scenes cached")
+
+    results = []
+    if pending:
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(args.mayapy)
+        workers = max(1, min(args.workers, len(pending)))
+        tasks = [(scene, scene_hash, args.cache_dir) for scene_hash, scene in pending.items()]
+        with context.Pool(processes=workers, initializer=init_worker) as pool:
+            for result in pool.imap_unordered(process_scene, tasks):
+                results.append(result)
+                print(f"[{len(results)}/{len(tasks)}] {result['status']:5} {result['scene']} "
+                      f"meshes={result['meshes']} ({result['seconds']:.1f}s)")
+
+    write_report(args.output, scenes, scene_hashes, args.cache_dir)
+
+    summary_path = f"{os.path.splitext(args.output)[0]}_summary.json"
+    with open(summary_path, "w") as f:
+        json.dump({"scenes": len(scenes),
+                   "counted": results,
+                   "cached": cached,
+                   "seconds": time.time() - start_time}, f, indent=4)
+
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
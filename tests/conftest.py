@@ -0,0 +1,64 @@
+import os
+import sys
+import types
+
+# The tools import Maya and Qt at module level. Only their pure Python parts are tested here,
+# so those modules are replaced with stand-ins whose attributes are empty placeholder classes.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _make_stub(name)
+
+
+def _make_stub(name):
+    return _StubMeta(name, (), {
+        "__init__": lambda self, *args, **kwargs: None,
+        "__call__": lambda self, *args, **kwargs: _make_stub(name)(),
+        "__getattr__": lambda self, attr: _make_stub(attr)(),
+    })
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = _make_stub(name)
+        setattr(self, name, value)
+        return value
+
+
+STUB_MODULES = [
+    "maya",
+    "maya.cmds",
+    "maya.mel",
+    "maya.standalone",
+    "maya.OpenMaya",
+    "maya.OpenMayaUI",
+    "maya.api",
+    "maya.api.OpenMaya",
+    "maya.api.OpenMayaAnim",
+    "maya.app",
+    "maya.app.general",
+    "maya.app.general.mayaMixin",
+    "maya.app.renderSetup",
+    "maya.app.renderSetup.model",
+    "maya.app.renderSetup.model.renderSetup",
+    "maya.app.renderSetup.model.renderLayer",
+    "PySide2",
+    "PySide2.QtCore",
+    "PySide2.QtGui",
+    "PySide2.QtWidgets",
+    "shiboken2",
+]
+
+for module_name in STUB_MODULES:
+    if module_name not in sys.modules:
+        sys.modules[module_name] = _StubModule(module_name)
+for module_name in STUB_MODULES:
+    parent_name, _, child_name = module_name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child_name, sys.modules[module_name])
@@ -0,0 +1,78 @@
+import pytest
+
+import file_repather_batch
+from file_repather import TextureIndex
+
+SCENE = (
+    b'requires maya "2024";\n'
+    b'createNode file -n "file1";\n'
+    b'\tsetAttr ".ftn" -type "string" "C:/old/wood.png";\n'
+)
+BINARY_SCENE = b"FOR4\x00\x00\x00\x20Maya\x00binary \"C:/old/wood.png\"\n"
+
+
+class InlinePool():
+    # Runs the workers in this process, the real pool would spawn mayapy
+    def __init__(self, processes=None, initializer=None, initargs=()):
+        if initializer:
+            initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def imap_unordered(self, function, tasks):
+        return map(function, tasks)
+
+
+class InlineContext():
+    Pool = InlinePool
+
+    def set_executable(self, executable):
+        pass
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_repather_batch.multiprocessing, "get_context", lambda method: InlineContext())
+    monkeypatch.setattr(TextureIndex, "get_default_cache_path", staticmethod(lambda root: str(tmp_path / "index.json")))
+
+    (tmp_path / "textures").mkdir()
+    (tmp_path / "textures" / "wood.png").write_bytes(b"")
+    (tmp_path / "scenes").mkdir()
+    (tmp_path / "scenes" / "shot.ma").write_bytes(SCENE)
+    (tmp_path / "scenes" / "shot.mb").write_bytes(BINARY_SCENE)
+    return tmp_path
+
+
+def run(library, *flags):
+    return file_repather_batch.main([str(library / "scenes" / "*"), "--ascii",
+                                     "--search-root", str(library / "textures"),
+                                     "--report-dir", str(library / "reports"), *flags])
+
+
+def test_ascii_only_rewrites_ma_scenes(library):
+    assert run(library) == 0
+
+    scenes = library / "scenes"
+    assert sorted(path.name for path in scenes.iterdir()) == ["shot.ma", "shot.mb", "shot_repathed.ma"]
+    assert (scenes / "shot.ma").read_bytes() == SCENE
+    assert (scenes / "shot.mb").read_bytes() == BINARY_SCENE
+    new_path = str(library / "textures" / "wood.png").replace("\\", "/").encode("utf-8")
+    assert new_path in (scenes / "shot_repathed.ma").read_bytes()
+
+
+def test_ascii_in_place_leaves_binary_scenes_alone(library):
+    assert run(library, "--in-place") == 0
+
+    scenes = library / "scenes"
+    assert sorted(path.name for path in scenes.iterdir()) == ["shot.ma", "shot.ma.bak", "shot.mb"]
+    assert (scenes / "shot.ma.bak").read_bytes() == SCENE
+    assert (scenes / "shot.ma").read_bytes() != SCENE
+    assert (scenes / "shot.mb").read_bytes() == BINARY_SCENE
+
+
+def test_in_place_needs_ascii(library):
+    assert file_repather_batch.main([str(library / "scenes" / "*"), "--in-place"]) == 1
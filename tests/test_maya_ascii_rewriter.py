@@ -0,0 +1,61 @@
+from file_repather import MayaAsciiRewriter
+
+
+class FakeRepather():
+    def __init__(self, resolved):
+        self.resolved = resolved
+
+    def verify_file(self, filepath, udim_mode=0):
+        return False
+
+    def resolve_texture(self, index, filepath, udim_mode=0):
+        return self.resolved.get(filepath)
+
+
+SCENE = (
+    b'requires maya "2024";\n'
+    b'createNode transform -n "pCube1";\n'
+    b'createNode file -n "file1";\n'
+    b'\tsetAttr ".ftn" -type "string" "C:/old/wood.png";\n'
+    b'createNode file -n "file2";\n'
+    b'\tsetAttr ".uvt" 3;\n'
+    b'\tsetAttr ".ftn" -type "string" "C:/old/a/very/long/directory/"\n'
+    b'\t\t + "name/skin.<UDIM>.exr";\n'
+    b'createNode lambert -n "lambert2";\n'
+)
+
+
+def rewrite(tmp_path, resolved, dry_run=False):
+    scene_path = tmp_path / "scene.ma"
+    scene_path.write_bytes(SCENE)
+    rewriter = MayaAsciiRewriter(repather=FakeRepather(resolved), index=object())
+    changes = rewriter.rewrite(str(scene_path), dry_run=dry_run)
+    return scene_path, changes
+
+
+def test_rewrite_writes_next_to_the_scene(tmp_path):
+    scene_path, changes = rewrite(tmp_path, {"C:/old/wood.png": "X:\\tex\\wood.png"})
+
+    assert changes == [{"node": "file1", "original": "C:/old/wood.png", "resolved": "X:/tex/wood.png"}]
+    assert scene_path.read_bytes() == SCENE
+    output = (tmp_path / "scene_repathed.ma").read_bytes()
+    assert output == SCENE.replace(b"C:/old/wood.png", b"X:/tex/wood.png")
+
+
+def test_rewrite_joins_continued_strings(tmp_path):
+    long_path = "C:/old/a/very/long/directory/name/skin.<UDIM>.exr"
+    scene_path, changes = rewrite(tmp_path, {long_path: "X:/tex/skin.<UDIM>.exr"})
+
+    assert [change["node"] for change in changes] == ["file2"]
+    assert changes[0]["original"] == long_path
+    output = (tmp_path / "scene_repathed.ma").read_bytes()
+    assert b'\tsetAttr ".ftn" -type "string" "X:/tex/skin.<UDIM>.exr";\n' in output
+    assert b"+ " not in output
+    assert output.endswith(b'createNode lambert -n "lambert2";\n')
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    scene_path, changes = rewrite(tmp_path, {"C:/old/wood.png": "X:/tex/wood.png"}, dry_run=True)
+
+    assert len(changes) == 1
+    assert not (tmp_path / "scene_repathed.ma").exists()
@@ -0,0 +1,37 @@
+import json
+import os
+
+import polycount_batch
+from polycount_batch import get_cache_path, get_manifest_path, is_cache_valid, stat_dependency
+
+
+def write_cache(cache_directory, scene_hash, dependencies):
+    with open(get_cache_path(cache_directory, scene_hash), "w") as f:
+        f.write(",".join(polycount_batch.MESH_COLUMNS) + "\n")
+    with open(get_manifest_path(cache_directory, scene_hash), "w") as f:
+        json.dump(dependencies, f)
+
+
+def test_cache_needs_counts_and_manifest(tmp_path):
+    assert not is_cache_valid(str(tmp_path), "abc")
+
+    with open(get_cache_path(str(tmp_path), "abc"), "w") as f:
+        f.write("")
+    assert not is_cache_valid(str(tmp_path), "abc")
+
+    write_cache(str(tmp_path), "abc", [])
+    assert is_cache_valid(str(tmp_path), "abc")
+
+
+def test_cache_is_stale_when_a_reference_changes(tmp_path):
+    reference = tmp_path / "prop.mb"
+    reference.write_bytes(b"one")
+    write_cache(str(tmp_path), "abc", [stat_dependency(str(reference))])
+    assert is_cache_valid(str(tmp_path), "abc")
+
+    reference.write_bytes(b"three")
+    assert not is_cache_valid(str(tmp_path), "abc")
+
+    write_cache(str(tmp_path), "abc", [stat_dependency(str(reference))])
+    os.remove(reference)
+    assert not is_cache_valid(str(tmp_path), "abc")
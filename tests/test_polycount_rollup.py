@@ -0,0 +1,57 @@
+import numpy as np
+
+from PolyCountChecker import PolyCountCollector, PolyCountRollup
+
+
+def make_counts(rows):
+    # (shape path, v, e, f, t) -> the collector's record array
+    records = []
+    for path, v, e, f, t in rows:
+        parent = path.rpartition("|")[0]
+        records.append((parent.rpartition("|")[2], parent, path, path, v, e, f, t))
+    return np.array(records, dtype=PolyCountCollector.DTYPE)
+
+
+COUNTS = make_counts([
+    ("|char_hero|body|bodyShape", 100, 200, 90, 180),
+    ("|char_hero|head|headShape", 50, 100, 40, 80),
+    ("|ENV|set_a|rock|rockShape", 10, 20, 8, 16),
+])
+
+
+def test_build_rolls_totals_up_to_the_scene():
+    rollup = PolyCountRollup()
+    rollup.build(COUNTS)
+
+    assert rollup.totals["|char_hero"].tolist() == [150, 300, 130, 260]
+    assert rollup.totals["|ENV|set_a"].tolist() == [10, 20, 8, 16]
+    assert rollup.totals[PolyCountRollup.SCENE].tolist() == [160, 320, 138, 276]
+
+
+def test_update_moves_only_the_changed_deltas():
+    rollup = PolyCountRollup()
+    counts = COUNTS.copy()
+    rollup.build(counts)
+
+    counts["t"][1] = 100
+    rollup.update(counts, [1])
+
+    assert rollup.totals["|char_hero|head"].tolist() == [50, 100, 40, 100]
+    assert rollup.totals["|char_hero"].tolist() == [150, 300, 130, 280]
+    assert rollup.totals[PolyCountRollup.SCENE].tolist() == [160, 320, 138, 296]
+
+
+def test_check_counts_a_total_at_its_limit_as_over():
+    rollup = PolyCountRollup()
+    rollup.build(COUNTS)
+    rollup.set_budgets({"scene": {"tris": 1000},
+                        "budgets": [{"match": "char_*", "tris": 260, "vertices": 500},
+                                    {"match": "|ENV|set_*", "quads": 10}]})
+
+    results = {result["node"]: result for result in rollup.check()}
+
+    assert results[PolyCountRollup.SCENE]["over"] == []
+    assert results["|char_hero"]["over"] == ["t"]
+    assert results["|char_hero"]["limits"] == {"t": 260, "v": 500}
+    assert results["|ENV|set_a"]["over"] == []
+    assert "|char_hero|body" not in results
@@ -0,0 +1,45 @@
+import vdb_importer
+from vdb_importer import ShaderAssigner, ShaderRule, ShaderTemplate
+
+
+class FakeCmds():
+    def __init__(self, hierarchy):
+        # root -> long shape paths below it
+        self.hierarchy = hierarchy
+
+    def ls(self, roots, **kwargs):
+        return [shape for root in roots for shape in self.hierarchy[root]]
+
+
+def test_rule_matches_short_name_or_full_path():
+    rule = ShaderRule("smoke_*", None)
+    assert rule.matches("|fx|smoke_main", "smoke_main")
+    assert not rule.matches("|smoke_fx|fire", "fire")
+
+    path_rule = ShaderRule("|fx|*", None)
+    assert path_rule.matches("|fx|fire", "fire")
+    assert not path_rule.matches("|env|fire", "fire")
+
+
+def test_template_names():
+    assert ShaderTemplate("{name}", "lambert").get_shader_name("char:body", "grp") == "char_body"
+    assert ShaderTemplate("{root}_fx", "lambert").get_shader_name("body", "ns:grp") == "ns_grp_fx"
+    assert ShaderTemplate("shared", "lambert").get_shader_name("body", "grp") == "shared"
+
+
+def test_match_groups_shapes_by_rule_and_root(monkeypatch):
+    monkeypatch.setattr(vdb_importer, "cmds", FakeCmds({
+        "grpA": ["|grpA|smoke|smokeShape", "|grpA|fire|fireShape"],
+        "grpB": ["|grpB|smoke2|smoke2Shape"],
+        "grpA|fire": ["|grpA|fire|fireShape"],
+    }))
+    smoke = ShaderTemplate("smoke", "aiStandardVolume")
+    fallback = ShaderTemplate("{root}", "lambert")
+    assigner = ShaderAssigner([ShaderRule("smoke*", smoke), ShaderRule("*", fallback)])
+
+    groups = assigner.match(["grpA", "grpB", "grpA|fire"])
+
+    assert groups == {
+        (smoke, "smoke"): ["|grpA|smoke|smokeShape", "|grpB|smoke2|smoke2Shape"],
+        (fallback, "grpA"): ["|grpA|fire|fireShape"],
+    }
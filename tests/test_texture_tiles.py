@@ -0,0 +1,70 @@
+import os
+
+from file_repather import File_Repather, TextureIndex, TextureTiles
+
+SEQUENCE = TextureTiles.FRAME_SEQUENCE
+
+
+def test_tokens_only_count_while_their_mode_is_on():
+    assert TextureTiles.get_tile_pattern("/tex/skin.<UDIM>.exr", 3) == "/tex/skin.<UDIM>.exr"
+    assert TextureTiles.get_tile_pattern("/tex/skin.<UDIM>.exr", 0) is None
+    assert TextureTiles.get_tile_pattern("/tex/fire.####.exr", SEQUENCE) == "/tex/fire.####.exr"
+    assert TextureTiles.get_tile_pattern("/tex/fire.####.exr", 3) is None
+
+
+def test_numbered_names_become_patterns():
+    assert TextureTiles.get_tile_pattern("/tex/skin.1001.exr", 3) == os.path.join("/tex", "skin.<UDIM>.exr")
+    assert TextureTiles.get_tile_pattern("/tex/skin_u1_v1.exr", 1) == os.path.join("/tex", "skin_u<U>_v<V>.exr")
+    assert TextureTiles.get_tile_pattern("/tex/fire.0012.exr", SEQUENCE) == os.path.join("/tex", "fire.####.exr")
+    assert TextureTiles.get_tile_pattern("/tex/fire.0012.exr", 0) is None
+    assert TextureTiles.get_tile_pattern("/tex/wood.exr", 3 | SEQUENCE) is None
+
+
+def test_missing_frames_are_sequence_gaps_only():
+    frames = ["/tex/fire.0001.exr", "/tex/fire.0002.exr", "/tex/fire.0005.exr"]
+    assert TextureTiles.get_missing_frames(frames, "/tex/fire.####.exr") == [3, 4]
+    assert TextureTiles.get_missing_frames(frames, "/tex/fire.%04d.exr") == [3, 4]
+
+    tiles = ["/tex/skin.1001.exr", "/tex/skin.1003.exr"]
+    assert TextureTiles.get_missing_frames(tiles, "/tex/skin.<UDIM>.exr") == []
+
+
+def test_verify_file_fails_sequences_with_gaps(tmp_path):
+    for frame in (1, 2, 4):
+        (tmp_path / f"fire.{frame:04d}.exr").write_bytes(b"")
+    for tile in (1001, 1003):
+        (tmp_path / f"skin.{tile}.exr").write_bytes(b"")
+    repather = File_Repather()
+    fire = str(tmp_path / "fire.0001.exr")
+    skin = str(tmp_path / "skin.<UDIM>.exr")
+
+    assert not repather.verify_file(fire, SEQUENCE)
+    assert repather.get_missing_frames(fire, SEQUENCE) == [3]
+    assert repather.verify_file(fire, 0)
+    assert repather.verify_file(skin, 3)
+    assert not repather.verify_file(skin, 0)
+
+
+def test_index_finds_files_and_the_fullest_tile_directory(tmp_path):
+    cache_path = str(tmp_path / "index.json")
+    root = tmp_path / "textures"
+    (root / "old").mkdir(parents=True)
+    (root / "new").mkdir()
+    (root / "old" / "skin.1001.exr").write_bytes(b"")
+    for tile in (1001, 1002, 1011):
+        (root / "new" / f"skin.{tile}.exr").write_bytes(b"")
+    (root / "new" / "wood.png").write_bytes(b"")
+
+    index = TextureIndex(str(root), cache_path=cache_path)
+    assert index.update()
+
+    assert index.find("/missing/wood.png") == str(root / "new" / "wood.png")
+    directory, tiles = index.find_tiles("/missing/skin.<UDIM>.exr")
+    assert directory == str(root / "new")
+    assert sorted(os.path.basename(tile) for tile in tiles) == ["skin.1001.exr", "skin.1002.exr", "skin.1011.exr"]
+
+    index.save()
+    reloaded = TextureIndex(str(root), cache_path=cache_path)
+    assert reloaded.load()
+    assert reloaded.update() == 0
+    assert len(reloaded) == len(index)
@@ -0,0 +1,56 @@
+import json
+
+from file_repather import TransferEngine
+
+
+def make_jobs(tmp_path, count):
+    (tmp_path / "src").mkdir()
+    jobs = []
+    for i in range(count):
+        source = tmp_path / "src" / f"tex{i}.png"
+        source.write_bytes(bytes([i]) * (i + 1))
+        jobs.append((str(source), str(tmp_path / "dst" / f"tex{i}.png")))
+    return jobs
+
+
+def test_run_copies_every_job_and_clears_the_journal(tmp_path):
+    jobs = make_jobs(tmp_path, 5)
+    journal_path = tmp_path / "scene.transfer.journal"
+    progress = []
+
+    results, errors = TransferEngine(journal_path=str(journal_path)).run(
+        jobs, progress=lambda done, total, source, destination, error: progress.append((done, total)))
+
+    assert errors == {}
+    assert results == {destination: source for source, destination in jobs}
+    for source, destination in jobs:
+        assert open(destination, "rb").read() == open(source, "rb").read()
+    assert progress[-1] == (5, 5)
+    assert not journal_path.exists()
+
+
+def test_run_resumes_from_the_journal(tmp_path):
+    jobs = make_jobs(tmp_path, 3)
+    (tmp_path / "dst").mkdir()
+    done_source, done_destination = jobs[0]
+    with open(done_destination, "wb") as f:
+        f.write(b"already copied")
+    journal_path = tmp_path / "scene.transfer.journal"
+    journal_path.write_text(json.dumps([done_source, done_destination]) + "\n" + '["half written')
+
+    results, errors = TransferEngine(journal_path=str(journal_path)).run(jobs)
+
+    assert errors == {}
+    assert len(results) == 3
+    assert open(done_destination, "rb").read() == b"already copied"
+    assert open(jobs[1][1], "rb").read() == open(jobs[1][0], "rb").read()
+
+
+def test_move_removes_the_sources(tmp_path):
+    jobs = make_jobs(tmp_path, 2)
+
+    results, errors = TransferEngine().run(jobs, move=True)
+
+    assert errors == {}
+    assert not any((tmp_path / "src" / f"tex{i}.png").exists() for i in range(2))
+    assert all((tmp_path / "dst" / f"tex{i}.png").exists() for i in range(2))
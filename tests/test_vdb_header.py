@@ -0,0 +1,93 @@
+import struct
+
+import pytest
+
+from vdb_importer import VdbHeader
+
+
+def pack_string(value):
+    data = value.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def pack_metadata(entries):
+    data = struct.pack("<I", len(entries))
+    for name, type_name, fmt, value in entries:
+        payload = struct.pack(fmt, *value)
+        data += pack_string(name) + pack_string(type_name) + struct.pack("<I", len(payload)) + payload
+    return data
+
+
+def write_vdb(path, file_version, scale=(0.5, 0.5, 0.5), translation=(10.0, 0.0, 0.0)):
+    header = struct.pack("<qI", VdbHeader.MAGIC, file_version)
+    if file_version >= 211:
+        header += struct.pack("<II", 10, 0)
+    if file_version >= 212:
+        header += struct.pack("<b", 1)
+    if 220 <= file_version < 222:
+        header += b"\x00"
+    header += b"0" * 36 if file_version >= 218 else b"\x00" * 16
+    header += pack_metadata([]) + struct.pack("<i", 1)
+
+    descriptor = pack_string("density") + pack_string("Tree_float_5_4_3")
+    if file_version >= 216:
+        descriptor += pack_string("")
+    grid_position = len(header) + len(descriptor) + 24
+
+    grid = b"\x00" * 4 if file_version >= 222 else b""
+    grid += pack_metadata([("file_bbox_min", "vec3i", "<3i", (0, 0, 0)),
+                           ("file_bbox_max", "vec3i", "<3i", (9, 9, 9)),
+                           ("file_voxel_count", "int64", "<q", (1000,))])
+    if file_version >= 216:
+        grid += pack_string("ScaleTranslateMap") + struct.pack("<3d", *translation) + struct.pack("<3d", *scale)
+    # Stands in for the topology and voxel data the reader seeks over
+    grid += b"\xff" * 64
+    end_position = grid_position + len(grid)
+
+    with open(path, "wb") as f:
+        f.write(header + descriptor + struct.pack("<3q", grid_position, grid_position, end_position) + grid)
+
+
+@pytest.mark.parametrize("file_version", [216, 219, 222, 224])
+def test_transform_is_read_from_grid_instancing_on(tmp_path, file_version):
+    path = str(tmp_path / f"v{file_version}.vdb")
+    write_vdb(path, file_version)
+
+    header = VdbHeader.read(path)
+
+    grid = header.grids[0]
+    assert header.get_grid_names() == ["density"]
+    assert grid.value_type == "float"
+    assert grid.voxel_count == 1000
+    assert grid.voxel_size == (0.5, 0.5, 0.5)
+    assert header.get_world_bbox() == ((9.75, -0.25, -0.25), (14.75, 4.75, 4.75))
+
+
+def test_older_files_have_no_world_bounds(tmp_path):
+    path = str(tmp_path / "v215.vdb")
+    write_vdb(path, 215)
+
+    header = VdbHeader.read(path)
+
+    assert header.grids[0].voxel_count == 1000
+    assert header.grids[0].matrix is None
+    assert header.get_world_bbox() is None
+
+
+def test_cache_is_bounded_and_follows_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(VdbHeader, "CACHE_SIZE", 2)
+    monkeypatch.setattr(VdbHeader, "_cache", type(VdbHeader._cache)())
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"smoke.{i}.vdb"))
+        write_vdb(paths[-1], 222)
+
+    first = VdbHeader.read(paths[0])
+    assert VdbHeader.read(paths[0]) is first
+    VdbHeader.read(paths[1])
+    VdbHeader.read(paths[0])
+    VdbHeader.read(paths[2])
+    assert list(VdbHeader._cache) == [paths[0], paths[2]]
+
+    write_vdb(paths[0], 219, scale=(1.0, 1.0, 1.0), translation=(0.0, 0.0, 0.0))
+    assert VdbHeader.read(paths[0]).grids[0].voxel_size == (1.0, 1.0, 1.0)
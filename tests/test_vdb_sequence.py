@@ -0,0 +1,46 @@
+from vdb_importer import VdbDiscoverer, VdbSequence
+
+
+def make_sequence(directory, filenames):
+    sequence = VdbSequence(directory, "smoke.")
+    for filename in filenames:
+        prefix, frame_text, extension = VdbSequence.parse(filename)
+        sequence.add_frame(frame_text, filename)
+    return sequence
+
+
+def test_parse():
+    assert VdbSequence.parse("smoke.0012.vdb") == ("smoke.", "0012", ".vdb")
+    assert VdbSequence.parse("static.vdb") == ("static", None, ".vdb")
+
+
+def test_frame_range_and_gaps():
+    sequence = make_sequence("/cache", ["smoke.0001.vdb", "smoke.0002.vdb", "smoke.0005.vdb"])
+
+    assert sequence.frame_range == (1, 5)
+    assert sequence.gaps == [3, 4]
+    assert sequence.padding == 4
+    assert sequence.first_path == "/cache/smoke.0001.vdb"
+    assert sequence.unique_name == "/cache/smoke"
+
+
+def test_sizes_follow_files_rewritten_in_place(tmp_path):
+    root = tmp_path / "vdbs"
+    root.mkdir()
+    cache_path = str(tmp_path / "listing.json")
+    (root / "smoke.0001.vdb").write_bytes(b"1234")
+    (root / "smoke.0002.vdb").write_bytes(b"12")
+    discoverer = VdbDiscoverer(str(root), cache_path=cache_path)
+
+    sequences = [sequence for batch in discoverer.scan() for sequence in batch]
+    assert sequences[0].stat_files() and sequences[0].sizes == {1: 4, 2: 2}
+    discoverer.save()
+
+    # Rewriting a frame keeps the directory listing cached, the sizes are still read fresh
+    (root / "smoke.0002.vdb").write_bytes(b"123456")
+    discoverer = VdbDiscoverer(str(root), cache_path=cache_path)
+    assert discoverer.load()
+    sequences = [sequence for batch in discoverer.scan() for sequence in batch]
+    assert discoverer.listed_directories == 0
+    sequences[0].stat_files()
+    assert sequences[0].sizes == {1: 4, 2: 6}
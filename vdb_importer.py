@@ -1,10 +1,20 @@
 import sys
+import os
+import re
+import fnmatch
+import struct
+import hashlib
+import json
+import tempfile
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PySide2 import QtCore, QtGui, QtWidgets
 from shiboken2 import wrapInstance, getCppPointer
 import maya.OpenMayaUI as omui
 import maya.cmds as cmds
-import glob
-import mtoa.core
+import maya.api.OpenMaya as om2
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 
 class CollapsibleHeader(QtWidgets.QWidget):
@@ -92,6 +102,824 @@ class CollapsibleWidget(QtWidgets.QWidget):
 
 
 
+class VdbSequence:
+    # The frame number is the run of digits right before the extension, "smoke_v2.1001.vdb" -> "smoke_v2.", 1001
+    FRAME_RE = re.compile(r"^(?P<prefix>.*?)(?P<frame>\d+)(?P<extension>\.vdb)$", re.IGNORECASE)
+    STAT_WORKERS = 8
+
+    def __init__(self, directory, prefix, extension=".vdb"):
+        self.directory = directory
+        self.prefix = prefix
+        self.extension = extension
+        self.padding = 0
+        # Frame -> file name, a file without a frame number is stored under None
+        self.frames = {}
+        # Frame -> (size in bytes, mtime_ns), filled by stat_files
+        self.stats = {}
+
+    @classmethod
+    def parse(cls, filename):
+        match = cls.FRAME_RE.match(filename)
+        if match:
+            return match.group("prefix"), match.group("frame"), match.group("extension")
+        stem, extension = os.path.splitext(filename)
+        return stem, None, extension
+
+    def add_frame(self, frame_text, filename):
+        frame = None if frame_text is None else int(frame_text)
+        self.frames[frame] = filename
+        if frame is None:
+            return
+        self.padding = len(frame_text) if not self.padding else min(self.padding, len(frame_text))
+
+    def update(self, other):
+        self.frames.update(other.frames)
+        self.stats.update(other.stats)
+        if other.padding:
+            self.padding = min(self.padding, other.padding) if self.padding else other.padding
+
+    def get_frame_numbers(self):
+        return sorted(frame for frame in self.frames if frame is not None)
+
+    @staticmethod
+    def stat_file(path):
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        return file_stat.st_size, file_stat.st_mtime_ns
+
+    def stat_files(self):
+        # Always read fresh, a frame re-simmed in place doesn't move the directory mtime the listing is cached on
+        frames = list(self.frames)
+        with ThreadPoolExecutor(max_workers=self.STAT_WORKERS) as executor:
+            stats = executor.map(self.stat_file, [self.get_path(frame) for frame in frames])
+            self.stats = {frame: stat for frame, stat in zip(frames, stats) if stat}
+        return self.stats
+
+    @property
+    def sizes(self):
+        return {frame: stat[0] for frame, stat in self.stats.items()}
+
+    @property
+    def frame_range(self):
+        frames = self.get_frame_numbers()
+        return (frames[0], frames[-1]) if frames else (None, None)
+
+    @property
+    def gaps(self):
+        frames = self.get_frame_numbers()
+        if not frames:
+            return []
+        return sorted(set(range(frames[0], frames[-1] + 1)).difference(frames))
+
+    @property
+    def first_path(self):
+        frames = self.get_frame_numbers()
+        filename = self.frames[frames[0]] if frames else self.frames.get(None)
+        return f"{self.directory}/{filename}" if filename else None
+
+    @property
+    def unique_name(self):
+        # Matches the old file[:-9] names, "dir/smoke.0001.vdb" -> "dir/smoke"
+        return f"{self.directory}/{self.prefix.rstrip('._-') or self.prefix}"
+
+    def get_path(self, frame):
+        filename = self.frames.get(frame)
+        return f"{self.directory}/{filename}" if filename else None
+
+    def get_description(self):
+        first_frame, last_frame = self.frame_range
+        if first_frame is None:
+            return self.first_path
+        description = f"{self.unique_name}\nFrames {first_frame}-{last_frame} ({len(self.get_frame_numbers())}), padding {self.padding}"
+        gaps = self.gaps
+        if gaps:
+            description += f"\nMissing {len(gaps)} frames: {', '.join(str(frame) for frame in gaps[:20])}"
+            if len(gaps) > 20:
+                description += ", ..."
+        return description
+
+
+class VdbDiscoverer:
+    CACHE_VERSION = 3
+
+    def __init__(self, root, cache_path=None):
+        self.root = root.replace("\\", "/")
+        self.cache_path = cache_path or self.get_default_cache_path(self.root)
+
+        # directory -> [mtime_ns, vdb filenames, subdirectory names]. Sizes aren't kept, overwriting
+        # a file leaves the directory mtime alone, so VdbSequence.stat_files reads them when needed
+        self._directories = {}
+        self.scanned_directories = 0
+        self.listed_directories = 0
+
+    @staticmethod
+    def get_default_cache_path(root):
+        key = hashlib.md5(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()
+        return os.path.join(tempfile.gettempdir(), "vdb_importer", f"listing_{key}.json")
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != self.CACHE_VERSION or data.get("root") != self.root:
+            return False
+
+        self._directories = data["directories"]
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        data = {"version": self.CACHE_VERSION, "root": self.root, "directories": self._directories}
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.cache_path)
+
+    def list_directory(self, directory):
+        # A directory's mtime only moves when entries are added, removed or renamed in it,
+        # so an unchanged listing is reused without touching the share again
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._directories.pop(directory, None)
+            return [], []
+
+        cached = self._directories.get(directory)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        filenames = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.name)
+                    elif entry.name.lower().endswith(".vdb"):
+                        filenames.append(entry.name)
+        except OSError:
+            pass
+
+        filenames.sort()
+        subdirectories.sort()
+        self._directories[directory] = [mtime, filenames, subdirectories]
+        self.listed_directories += 1
+        return filenames, subdirectories
+
+    def scan_directory(self, directory):
+        # Frames of a sequence live in one directory, so its sequences are complete once it is listed
+        filenames, subdirectories = self.list_directory(directory)
+        directory = directory.rstrip("/") or directory
+        sequences = {}
+        for filename in filenames:
+            prefix, frame_text, extension = VdbSequence.parse(filename)
+            key = (prefix, extension.lower())
+            sequence = sequences.get(key)
+            if sequence is None:
+                sequence = sequences[key] = VdbSequence(directory, prefix, extension)
+            sequence.add_frame(frame_text, filename)
+        subdirectories = [f"{directory.rstrip('/')}/{name}" for name in subdirectories]
+        return sorted(sequences.values(), key=lambda sequence: sequence.unique_name), subdirectories
+
+    def scan(self, should_stop=None):
+        # Yields each directory's sequences as soon as it has been listed
+        self.scanned_directories = 0
+        self.listed_directories = 0
+        visited = set()
+        stack = [self.root]
+        while stack:
+            if should_stop and should_stop():
+                return
+            directory = stack.pop()
+            visited.add(directory)
+            sequences, subdirectories = self.scan_directory(directory)
+            self.scanned_directories += 1
+            stack.extend(reversed(subdirectories))
+            if sequences:
+                yield sequences
+
+        # Only a finished scan knows which directories are gone
+        self._directories = {directory: listing for directory, listing in self._directories.items()
+                             if directory in visited}
+
+
+class VdbScanWorker(QtCore.QThread):
+    # Batches of VdbSequence records, then (directories scanned, sequences found)
+    sequences_found = QtCore.Signal(object)
+    progress = QtCore.Signal(int, int)
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.completed = False
+
+    def run(self):
+        discoverer = VdbDiscoverer(self.root)
+        discoverer.load()
+
+        batch = []
+        found = 0
+        last_emit = time.time()
+        for sequences in discoverer.scan(should_stop=self.isInterruptionRequested):
+            batch.extend(sequences)
+            found += len(sequences)
+            if time.time() - last_emit >= self.BATCH_INTERVAL:
+                self.sequences_found.emit(batch)
+                self.progress.emit(discoverer.scanned_directories, found)
+                batch = []
+                last_emit = time.time()
+
+        if batch:
+            self.sequences_found.emit(batch)
+        self.progress.emit(discoverer.scanned_directories, found)
+
+        self.completed = not self.isInterruptionRequested()
+        if self.completed or discoverer.listed_directories:
+            try:
+                discoverer.save()
+            except OSError:
+                pass
+
+
+class VdbGridInfo:
+
+    def __init__(self, name, grid_type, half_float=False, instance_parent=""):
+        self.name = name
+        self.grid_type = grid_type
+        self.half_float = half_float
+        self.instance_parent = instance_parent
+        self.metadata = {}
+        self.map_type = None
+        # Row vector matrix from index space to world space, None when the map can't be read
+        self.matrix = None
+        self.voxel_size = None
+
+    @property
+    def value_type(self):
+        # "Tree_float_5_4_3" -> "float"
+        parts = self.grid_type.split("_")
+        return parts[1] if len(parts) > 1 else self.grid_type
+
+    @property
+    def is_vector(self):
+        return self.value_type.startswith("vec3")
+
+    @property
+    def voxel_count(self):
+        return self.metadata.get("file_voxel_count")
+
+    @property
+    def index_bbox(self):
+        if "file_bbox_min" not in self.metadata or "file_bbox_max" not in self.metadata:
+            return None
+        return self.metadata["file_bbox_min"], self.metadata["file_bbox_max"]
+
+    @property
+    def world_bbox(self):
+        index_bbox = self.index_bbox
+        if index_bbox is None or self.matrix is None:
+            return None
+        # Voxel centres sit on the integer coordinates, so the bounds reach half a voxel further
+        (min_x, min_y, min_z), (max_x, max_y, max_z) = index_bbox
+        corners = [(x, y, z) for x in (min_x - 0.5, max_x + 0.5) for y in (min_y - 0.5, max_y + 0.5)
+                   for z in (min_z - 0.5, max_z + 0.5)]
+        points = [VdbHeader.transform_point(self.matrix, corner) for corner in corners]
+        return (tuple(min(point[i] for point in points) for i in range(3)),
+                tuple(max(point[i] for point in points) for i in range(3)))
+
+
+class VdbHeader:
+    MAGIC = 0x56444220
+    GRID_NAME_SEPARATOR = "\x1e"
+    HALF_FLOAT_SUFFIX = "_HalfFloat"
+
+    METADATA_FORMATS = {"bool": "<?", "int32": "<i", "int64": "<q", "float": "<f", "double": "<d",
+                        "vec2i": "<2i", "vec2s": "<2f", "vec2d": "<2d",
+                        "vec3i": "<3i", "vec3s": "<3f", "vec3d": "<3d"}
+
+    # Path -> (size, mtime, VdbHeader), least recently read first. Shared by the reader threads
+    CACHE_SIZE = 512
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self.file_version = 0
+        self.library_version = (0, 0)
+        self.uuid = ""
+        self.metadata = {}
+        self.grids = []
+
+    @classmethod
+    def read(cls, path):
+        # Only the header, the grid descriptors and each grid's metadata and transform are read,
+        # the voxel data is skipped with seeks so the cost doesn't grow with the file size
+        file_stat = os.stat(path)
+        with cls._cache_lock:
+            cached = cls._cache.get(path)
+            if cached and cached[:2] == (file_stat.st_size, file_stat.st_mtime_ns):
+                cls._cache.move_to_end(path)
+                return cached[2]
+
+        header = cls(path)
+        with open(path, "rb") as f:
+            header.read_header(f)
+
+        with cls._cache_lock:
+            cls._cache[path] = (file_stat.st_size, file_stat.st_mtime_ns, header)
+            cls._cache.move_to_end(path)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return header
+
+    @classmethod
+    def transform_point(cls, matrix, point):
+        x, y, z = point
+        return tuple(x * matrix[0][i] + y * matrix[1][i] + z * matrix[2][i] + matrix[3][i] for i in range(3))
+
+    def get_grid_names(self):
+        return [grid.name for grid in self.grids]
+
+    def get_world_bbox(self):
+        bboxes = [grid.world_bbox for grid in self.grids if grid.world_bbox]
+        if not bboxes:
+            return None
+        return (tuple(min(bbox[0][i] for bbox in bboxes) for i in range(3)),
+                tuple(max(bbox[1][i] for bbox in bboxes) for i in range(3)))
+
+    def read_header(self, f):
+        magic = self.unpack(f, "<q")
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.path} is not a VDB file")
+
+        self.file_version = self.unpack(f, "<I")
+        if self.file_version >= 211:
+            self.library_version = (self.unpack(f, "<I"), self.unpack(f, "<I"))
+        has_grid_offsets = True
+        if self.file_version >= 212:
+            has_grid_offsets = bool(self.unpack(f, "<b"))
+        if 220 <= self.file_version < 222:
+            f.read(1)
+        if self.file_version >= 218:
+            self.uuid = f.read(36).decode("ascii", "replace")
+        else:
+            self.uuid = f.read(16).hex()
+
+        self.metadata = self.read_metadata(f)
+        if not has_grid_offsets:
+            raise ValueError(f"{self.path} was written as a stream and can't be read partially")
+
+        grid_count = self.unpack(f, "<i")
+        for i in range(grid_count):
+            grid, grid_position, end_position = self.read_grid_descriptor(f)
+            f.seek(grid_position)
+            self.read_grid(f, grid)
+            self.grids.append(grid)
+            f.seek(end_position)
+
+    def read_grid_descriptor(self, f):
+        unique_name = self.read_string(f)
+        grid_type = self.read_string(f)
+        half_float = grid_type.endswith(self.HALF_FLOAT_SUFFIX)
+        if half_float:
+            grid_type = grid_type[:-len(self.HALF_FLOAT_SUFFIX)]
+        instance_parent = self.read_string(f) if self.file_version >= 216 else ""
+        grid_position, block_position, end_position = self.unpack(f, "<3q")
+
+        name = unique_name.split(self.GRID_NAME_SEPARATOR)[0]
+        return VdbGridInfo(name, grid_type, half_float, instance_parent), grid_position, end_position
+
+    def read_grid(self, f, grid):
+        if self.file_version >= 222:
+            f.read(4)
+        grid.metadata = self.read_metadata(f)
+        # Files before grid instancing (216) store the transform after the topology, which would mean reading the tree
+        if self.file_version >= 216:
+            self.read_transform(f, grid)
+
+    def read_transform(self, f, grid):
+        grid.map_type = self.read_string(f)
+        if grid.map_type in ("ScaleMap", "UniformScaleMap"):
+            scale = self.unpack(f, "<3d")
+            self.set_scale_translate(grid, scale, (0.0, 0.0, 0.0))
+        elif grid.map_type in ("ScaleTranslateMap", "UniformScaleTranslateMap"):
+            translation = self.unpack(f, "<3d")
+            scale = self.unpack(f, "<3d")
+            self.set_scale_translate(grid, scale, translation)
+        elif grid.map_type == "TranslationMap":
+            self.set_scale_translate(grid, (1.0, 1.0, 1.0), self.unpack(f, "<3d"))
+        elif grid.map_type in ("AffineMap", "UnitaryMap"):
+            values = self.unpack(f, "<16d")
+            grid.matrix = [values[i:i + 4] for i in range(0, 16, 4)]
+            grid.voxel_size = tuple(sum(value * value for value in grid.matrix[i][:3]) ** 0.5 for i in range(3))
+
+    def set_scale_translate(self, grid, scale, translation):
+        grid.matrix = [(scale[0], 0.0, 0.0, 0.0), (0.0, scale[1], 0.0, 0.0), (0.0, 0.0, scale[2], 0.0),
+                       tuple(translation) + (1.0,)]
+        grid.voxel_size = tuple(abs(value) for value in scale)
+
+    def read_metadata(self, f):
+        metadata = {}
+        for i in range(self.unpack(f, "<I")):
+            name = self.read_string(f)
+            type_name = self.read_string(f)
+            size = self.unpack(f, "<I")
+            data = f.read(size)
+            if type_name == "string":
+                metadata[name] = data.decode("utf-8", "replace")
+            elif type_name in self.METADATA_FORMATS and struct.calcsize(self.METADATA_FORMATS[type_name]) == size:
+                value = struct.unpack(self.METADATA_FORMATS[type_name], data)
+                metadata[name] = value[0] if len(value) == 1 else value
+        return metadata
+
+    def read_string(self, f):
+        return f.read(self.unpack(f, "<I")).decode("utf-8", "replace")
+
+    def unpack(self, f, fmt):
+        size = struct.calcsize(fmt)
+        data = f.read(size)
+        if len(data) != size:
+            raise ValueError(f"{self.path} ended unexpectedly")
+        value = struct.unpack(fmt, data)
+        return value[0] if len(value) == 1 else value
+
+
+class VdbFootprint:
+    HEADER_SAMPLES = 3
+
+    @classmethod
+    def format_size(cls, size):
+        if size is None:
+            return "-"
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024:
+                return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+            size /= 1024
+        return f"{size:.1f} TB"
+
+    @classmethod
+    def get_sample_frames(cls, sequence):
+        frames = sequence.get_frame_numbers() or ([None] if None in sequence.frames else [])
+        if len(frames) <= cls.HEADER_SAMPLES:
+            return frames
+        step = (len(frames) - 1) / (cls.HEADER_SAMPLES - 1)
+        return sorted({frames[round(i * step)] for i in range(cls.HEADER_SAMPLES)})
+
+    @classmethod
+    def analyze(cls, sequence):
+        # Sizes are one stat per frame, only a few headers are opened for the voxel counts
+        sequence.stat_files()
+        sizes = list(sequence.sizes.values())
+        first_frame, last_frame = sequence.frame_range
+        summary = {"name": sequence.unique_name,
+                   "first_path": sequence.first_path,
+                   "frame_range": [first_frame, last_frame],
+                   "frame_count": len(sequence.frames),
+                   "padding": sequence.padding,
+                   "missing_frames": sequence.gaps,
+                   "size_min": min(sizes) if sizes else None,
+                   "size_max": max(sizes) if sizes else None,
+                   "size_avg": sum(sizes) / len(sizes) if sizes else None,
+                   "size_total": sum(sizes) if sizes else None,
+                   "grids": [],
+                   "voxels_per_frame": None,
+                   "voxels_total": None}
+
+        voxel_counts = []
+        for frame in cls.get_sample_frames(sequence):
+            try:
+                header = VdbHeader.read(sequence.get_path(frame))
+            except (OSError, ValueError):
+                continue
+            counts = [grid.voxel_count for grid in header.grids if grid.voxel_count is not None]
+            if counts:
+                voxel_counts.append(sum(counts))
+            if not summary["grids"]:
+                summary["grids"] = [{"name": grid.name, "type": grid.value_type, "voxel_count": grid.voxel_count,
+                                     "voxel_size": grid.voxel_size} for grid in header.grids]
+
+        if voxel_counts:
+            summary["voxels_per_frame"] = sum(voxel_counts) / len(voxel_counts)
+            summary["voxels_total"] = int(summary["voxels_per_frame"] * summary["frame_count"])
+        return summary
+
+    @classmethod
+    def export(cls, summaries, path):
+        with open(path, "w") as f:
+            json.dump({"sequences": summaries,
+                       "size_total": sum(summary["size_total"] or 0 for summary in summaries)}, f, indent=4)
+
+
+class VdbProxy:
+    CACHE_VERSION = 2
+    READ_WORKERS = 8
+    # A degree 1 curve running over all twelve edges of a unit cube
+    BOX_POINTS = [(-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5),
+                  (-0.5, 0.5, -0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (0.5, 0.5, 0.5),
+                  (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5), (-0.5, -0.5, 0.5), (-0.5, 0.5, 0.5),
+                  (-0.5, 0.5, -0.5)]
+
+    @staticmethod
+    def get_cache_path(sequence):
+        key = hashlib.md5(os.path.normcase(sequence.unique_name).encode("utf-8")).hexdigest()
+        return os.path.join(tempfile.gettempdir(), "vdb_importer", f"proxy_{key}.json")
+
+    @classmethod
+    def read_frame_bounds(cls, path):
+        try:
+            bbox = VdbHeader.read(path).get_world_bbox()
+        except (OSError, ValueError):
+            return None
+        return list(bbox[0]) + list(bbox[1]) if bbox else None
+
+    @classmethod
+    def get_frame_bounds(cls, sequence):
+        # frame -> [min x, min y, min z, max x, max y, max z], cached per sequence and checked against each file's size and mtime
+        stats = sequence.stat_files()
+        cache_path = cls.get_cache_path(sequence)
+        try:
+            with open(cache_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != cls.CACHE_VERSION:
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        cached = data.get("frames", {})
+
+        bounds = {}
+        stale = []
+        for frame in sequence.frames:
+            key = "static" if frame is None else str(frame)
+            entry = cached.get(key)
+            stat = stats.get(frame)
+            if entry and stat and entry[0] == list(stat):
+                bounds[frame] = entry[1]
+            else:
+                stale.append(frame)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=cls.READ_WORKERS) as executor:
+                paths = [sequence.get_path(frame) for frame in stale]
+                for frame, frame_bounds in zip(stale, executor.map(cls.read_frame_bounds, paths)):
+                    bounds[frame] = frame_bounds
+
+            frames = {"static" if frame is None else str(frame): [list(stats[frame]) if frame in stats else None, frame_bounds]
+                      for frame, frame_bounds in bounds.items()}
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, "w") as f:
+                    json.dump({"version": cls.CACHE_VERSION, "name": sequence.unique_name, "frames": frames}, f)
+            except OSError:
+                pass
+
+        return {frame: frame_bounds for frame, frame_bounds in bounds.items() if frame_bounds}
+
+    @classmethod
+    def create(cls, sequence, parent=None):
+        bounds = cls.get_frame_bounds(sequence)
+        if not bounds:
+            return None
+
+        name = sequence.unique_name.split("/")[-1]
+        proxy = cmds.curve(degree=1, point=cls.BOX_POINTS, name=f"{name}_PROXY")
+        if parent:
+            proxy = cmds.parent(proxy, parent, relative=True)[0]
+
+        # A box scaled and moved onto each frame's bounds, the grids themselves are never loaded
+        frames = sorted(frame for frame in bounds if frame is not None) or [None]
+        channels = {"translateX": [], "translateY": [], "translateZ": [],
+                    "scaleX": [], "scaleY": [], "scaleZ": []}
+        for frame in frames:
+            min_x, min_y, min_z, max_x, max_y, max_z = bounds[frame]
+            for axis, low, high in (("X", min_x, max_x), ("Y", min_y, max_y), ("Z", min_z, max_z)):
+                channels[f"translate{axis}"].append((low + high) * 0.5)
+                channels[f"scale{axis}"].append(high - low)
+
+        if frames == [None]:
+            for attribute, values in channels.items():
+                cmds.setAttr(f"{proxy}.{attribute}", values[0])
+        else:
+            cls.key_channels(proxy, frames, channels)
+        return proxy
+
+    @classmethod
+    def key_channels(cls, node, frames, channels):
+        # Each curve is filled with one keyTimeValue setAttr instead of a setKeyframe per frame.
+        # Everything goes through cmds so the keys are undone together with the proxy
+        curves = []
+        for attribute, values in channels.items():
+            curve_type = "animCurveTL" if attribute.startswith("translate") else "animCurveTU"
+            curve = cmds.createNode(curve_type, name=f"{node.split('|')[-1]}_{attribute}", skipSelect=True)
+            keys = [item for frame, value in zip(frames, values) for item in (frame, value)]
+            cmds.setAttr(f"{curve}.keyTimeValue[0:{len(frames) - 1}]", *keys, size=len(frames))
+            cmds.connectAttr(f"{curve}.output", f"{node}.{attribute}")
+            curves.append(curve)
+
+        # Stepped so a missing frame holds the last known bounds
+        cmds.keyTangent(curves, edit=True, outTangentType="step")
+
+class VdbVolumeBuilder:
+    VELOCITY_RE = re.compile(r"^(v|vel|velocity)([._][xyz])?$", re.IGNORECASE)
+    BOUNDS_ATTRIBUTES = [("MinBoundingBox", "MaxBoundingBox"), ("BoundingBoxMin", "BoundingBoxMax")]
+
+    def __init__(self, shader_type="aiStandardVolume", create_proxies=False):
+        self.shader_type = shader_type
+        self.create_proxies = create_proxies
+
+    def build(self, sequences):
+        # One undo chunk and no viewport redraws for the whole import
+        if not cmds.pluginInfo("mtoa", q=True, loaded=True):
+            cmds.loadPlugin("mtoa")
+
+        transforms = []
+        cmds.undoInfo(openChunk=True, chunkName="VdbImport")
+        cmds.refresh(suspend=True)
+        try:
+            for sequence in sequences:
+                transforms.append(self.create_volume(sequence))
+        finally:
+            cmds.refresh(suspend=False)
+            cmds.undoInfo(closeChunk=True)
+
+        if transforms:
+            cmds.select(transforms)
+        return transforms
+
+    def create_volume(self, sequence):
+        name = sequence.unique_name.split("/")[-1]
+        transform = cmds.createNode("transform", name=name, skipSelect=True)
+        ai_volume = cmds.createNode("aiVolume", name=f"{name}_VOL", parent=transform, skipSelect=True)
+
+        cmds.setAttr(f"{ai_volume}.filename", sequence.first_path, type="string")
+        if sequence.get_frame_numbers():
+            cmds.setAttr(f"{ai_volume}.useFrameExtension", 1)
+            if cmds.attributeQuery("frame", node=ai_volume, exists=True):
+                cmds.connectAttr("time1.outTime", f"{ai_volume}.frame", force=True)
+        self.set_volume_grids(ai_volume, sequence.first_path)
+
+        shader = cmds.shadingNode(self.shader_type, asShader=True, name=f"{name}_MAT", skipSelect=True)
+        shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=f"{name}_SG")
+        cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.volumeShader")
+        # A new shape only needs its instance plug wiring up, which is what sets -forceElement ends up doing
+        cmds.connectAttr(f"{ai_volume}.instObjGroups[0]", f"{shading_group}.dagSetMembers", nextAvailable=True)
+
+        if self.create_proxies:
+            VdbProxy.create(sequence, parent=transform)
+        return transform
+
+    def set_volume_grids(self, ai_volume, path):
+        try:
+            header = VdbHeader.read(path)
+        except (OSError, ValueError) as e:
+            cmds.warning(f"Couldn't read the VDB header of {path}: {e}")
+            return None
+
+        velocity_grids = [grid.name for grid in header.grids if self.VELOCITY_RE.match(grid.name)]
+        grids = [grid.name for grid in header.grids if grid.name not in velocity_grids]
+        self.set_volume_attribute(ai_volume, "grids", " ".join(grids), type="string")
+        if velocity_grids:
+            self.set_volume_attribute(ai_volume, "velocityGrids", " ".join(velocity_grids), type="string")
+
+        bbox = header.get_world_bbox()
+        if bbox:
+            for attributes in self.BOUNDS_ATTRIBUTES:
+                if all(cmds.attributeQuery(attribute, node=ai_volume, exists=True) for attribute in attributes):
+                    for attribute, value in zip(attributes, bbox):
+                        cmds.setAttr(f"{ai_volume}.{attribute}", *value)
+                    break
+        return header
+
+    def set_volume_attribute(self, node, attribute, *values, **kwargs):
+        # mtoa versions differ in which attributes aiVolume has
+        if cmds.attributeQuery(attribute, node=node, exists=True):
+            cmds.setAttr(f"{node}.{attribute}", *values, **kwargs)
+            return True
+        return False
+
+
+class ShaderTemplate:
+
+    def __init__(self, name, shader_type, surface=True, volume=False, reuse=True):
+        # "{name}" in the name gives every object its own shader and "{root}" every listed root,
+        # any other name is shared. With reuse a same-named shader of the same type already in the scene is shared too
+        self.name = name
+        self.shader_type = shader_type
+        self.surface = surface
+        self.volume = volume
+        self.reuse = reuse
+
+    def get_shader_name(self, object_name, root_name=""):
+        return (self.name.replace("{name}", object_name.replace(":", "_"))
+                .replace("{root}", root_name.replace(":", "_")))
+
+
+class ShaderRule:
+
+    def __init__(self, pattern, template):
+        self.pattern = pattern
+        self.template = template
+
+    def matches(self, path, name):
+        # Patterns with a | match the full path, anything else the object's short name
+        return fnmatch.fnmatchcase(path if "|" in self.pattern else name, self.pattern)
+
+
+class ShaderAssigner:
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._shading_groups = {}
+
+    @classmethod
+    def get_shapes(cls, roots):
+        # Every shape under every root in one call
+        if not roots:
+            return []
+        return cmds.ls(roots, dag=True, shapes=True, noIntermediate=True, long=True) or []
+
+    def match(self, roots):
+        # (template, shader name) -> shapes, the first matching rule wins. A shape under
+        # several listed roots belongs to the first of them
+        groups = {}
+        seen = set()
+        for root in roots:
+            root_name = root.split("|")[-1].rpartition(":")[2]
+            for shape in self.get_shapes([root]):
+                if shape in seen:
+                    continue
+                seen.add(shape)
+                parts = shape.split("|")
+                transform_path = "|".join(parts[:-1]) or shape
+                name = parts[-2] if len(parts) > 2 else parts[-1]
+                for rule in self.rules:
+                    if rule.matches(transform_path, name):
+                        key = (rule.template, rule.template.get_shader_name(name.rpartition(":")[2], root_name))
+                        groups.setdefault(key, []).append(shape)
+                        break
+        return groups
+
+    def get_shading_group(self, template, shader_name):
+        key = (template, shader_name)
+        if key in self._shading_groups:
+            return self._shading_groups[key]
+
+        # Shares a shader left by an earlier run instead of making shader_MAT1, shader_MAT2...
+        # ls with a type only returns nodes of that type, so a same-named node of another
+        # type or one in a different namespace is never picked up
+        shader = f"{shader_name}_MAT"
+        existing = cmds.ls(shader, type=template.shader_type) if template.reuse else []
+        shading_groups = []
+        if existing:
+            shader = existing[0]
+            shading_groups = cmds.listConnections(f"{shader}.outColor", type="shadingEngine") or []
+        else:
+            shader = cmds.shadingNode(template.shader_type, asShader=True, name=shader, skipSelect=True)
+
+        if shading_groups:
+            shading_group = shading_groups[0]
+        else:
+            shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=f"{shader_name}_SG")
+            if template.surface:
+                cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.surfaceShader")
+            if template.volume:
+                cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.volumeShader")
+
+        self._shading_groups[key] = shading_group
+        return shading_group
+
+    def assign(self, roots):
+        assigned = {}
+        cmds.undoInfo(openChunk=True, chunkName="ShaderAssign")
+        cmds.refresh(suspend=True)
+        try:
+            for (template, shader_name), shapes in self.match(roots).items():
+                shading_group = self.get_shading_group(template, shader_name)
+                cmds.sets(shapes, e=True, forceElement=shading_group)
+                assigned[shading_group] = len(shapes)
+        finally:
+            cmds.refresh(suspend=False)
+            cmds.undoInfo(closeChunk=True)
+        return assigned
+
+
+class FootprintTreeItem(QtWidgets.QTreeWidgetItem):
+
+    def __lt__(self, other):
+        # Sorts sizes and counts by their raw values instead of the formatted text
+        column = self.treeWidget().sortColumn()
+        value = self.data(column, QtCore.Qt.UserRole)
+        other_value = other.data(column, QtCore.Qt.UserRole)
+        if value is None or other_value is None:
+            return super().__lt__(other)
+        return value < other_value
+
+
 class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     UI_NAME = "VdbImporter"
 
@@ -109,7 +937,10 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
 
             omui.MQtUtil.addWidgetToMayaLayout(widget_ptr, workspace_control_ptr)
 
-        self.accepted_files = []
+        # Unique name -> VdbSequence of everything in the list
+        self.accepted_files = {}
+        self.scan_worker = None
+        self.footprints = {}
         self.create_widgets()
         self.create_layouts()
         self.create_connections()
@@ -122,8 +953,14 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.load_btn = QtWidgets.QPushButton("..")
         self.load_btn.setFixedWidth(30)
 
+        self.scan_progress_label = QtWidgets.QLabel()
+        self.scan_cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.scan_cancel_btn.setEnabled(False)
+
         self.file_remove_btn = QtWidgets.QPushButton("Remove")
         self.volume_create_btn = QtWidgets.QPushButton("Create")
+        self.proxy_checkbox = QtWidgets.QCheckBox("Bounding Box Proxy")
+        self.proxy_checkbox.setToolTip("Add an animated box matching each frame's bounds from the VDB headers")
 
         self.material_header = CollapsibleWidget("Create Materials")
 
@@ -141,6 +978,25 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         self.material_list_field = QtWidgets.QListWidget()
         self.material_field = QtWidgets.QLineEdit("blinn")
 
+        self.rule_table = QtWidgets.QTableWidget(0, 3)
+        self.rule_table.setHorizontalHeaderLabels(["Pattern", "Shader", "Name"])
+        self.rule_table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.rule_table.verticalHeader().hide()
+        self.rule_table.setToolTip("Objects under the listed roots take the first rule their name matches.\n"
+                                   "A name with {name} makes one shader per object, any other name is shared.\n"
+                                   "Without rules every object gets its own Material shader.")
+        self.rule_add_btn = QtWidgets.QPushButton("Add Rule")
+        self.rule_remove_btn = QtWidgets.QPushButton("Remove Rule")
+
+        self.footprint_header = CollapsibleWidget("Cache Footprint")
+
+        self.footprint_tree = QtWidgets.QTreeWidget()
+        self.footprint_tree.setHeaderLabels(["Sequence", "Frames", "Missing", "Avg Size", "Max Size", "Total", "Voxels/Frame"])
+        self.footprint_tree.setSortingEnabled(True)
+        self.footprint_analyze_btn = QtWidgets.QPushButton("Analyze")
+        self.footprint_analyze_btn.setToolTip("Summarise the selected sequences, or every sequence when none are selected")
+        self.footprint_export_btn = QtWidgets.QPushButton("Export JSON")
+
     def create_layouts(self):
         self.body_wdg = QtWidgets.QWidget()
 
@@ -155,7 +1011,10 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         file_load_layout.addWidget(self.load_btn)
 
         file_button_layout = QtWidgets.QHBoxLayout()
+        file_button_layout.addWidget(self.scan_progress_label)
         file_button_layout.addStretch()
+        file_button_layout.addWidget(self.scan_cancel_btn)
+        file_button_layout.addWidget(self.proxy_checkbox)
         file_button_layout.addWidget(self.file_remove_btn)
         file_button_layout.addWidget(self.volume_create_btn)
 
@@ -169,6 +1028,12 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
         form_layout = QtWidgets.QFormLayout()
         form_layout.addRow("Object Names:", self.material_list_field)
         form_layout.addRow("Material:", self.material_field)
+        form_layout.addRow("Rules:", self.rule_table)
+        rule_button_layout = QtWidgets.QHBoxLayout()
+        rule_button_layout.addStretch()
+        rule_button_layout.addWidget(self.rule_add_btn)
+        rule_button_layout.addWidget(self.rule_remove_btn)
+        form_layout.addRow("", rule_button_layout)
         checkbox_layout = QtWidgets.QHBoxLayout()
         checkbox_layout.addStretch()
         checkbox_layout.addWidget(self.surface_checkbox)
@@ -187,7 +1052,16 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
 
         self.material_header.add_layout(material_layout)
 
+        footprint_button_layout = QtWidgets.QHBoxLayout()
+        footprint_button_layout.addStretch()
+        footprint_button_layout.addWidget(self.footprint_analyze_btn)
+        footprint_button_layout.addWidget(self.footprint_export_btn)
+
+        self.footprint_header.add_widget(self.footprint_tree)
+        self.footprint_header.add_layout(footprint_button_layout)
+
         self.body_layout.addWidget(self.file_header)
+        self.body_layout.addWidget(self.footprint_header)
         self.body_layout.addWidget(self.material_header)
 
         scroll_layout = QtWidgets.QScrollArea()
@@ -203,9 +1077,14 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     def create_connections(self):
 
         self.file_remove_btn.clicked.connect(self.file_list_remove)
+        self.scan_cancel_btn.clicked.connect(self.cancel_scan)
+        self.footprint_analyze_btn.clicked.connect(self.analyze_footprint)
+        self.footprint_export_btn.clicked.connect(self.export_footprint)
         self.close_btn.clicked.connect(self.close)
         self.update_btn.clicked.connect(self.update_material_list)
         self.accept_btn.clicked.connect(self.create_shaders_multiple)
+        self.rule_add_btn.clicked.connect(self.add_rule)
+        self.rule_remove_btn.clicked.connect(self.remove_rules)
         self.load_btn.clicked.connect(self.open_directory)
         self.file_edit.editingFinished.connect(self.update_VDB_list)
         self.volume_create_btn.clicked.connect(self.create_ai_volume)
@@ -222,21 +1101,43 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
                 self.material_list_field.addItem(obj)
 
     def create_shaders_multiple(self):
-
-        material = self.material_field.text()
-        for obj_name in self.get_list_widget_items(self.material_list_field):
-            self.create_shader(material, obj_name)
-
-    def create_shader(self, material_name, object_name):
-        shader = cmds.shadingNode(f"{material_name}", asShader=True, n=f"{object_name}_MAT")
-        shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True)
-        if self.surface_checkbox.isChecked():
-            cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.surfaceShader")
-        if self.volume_checkbox.isChecked():
-            cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.volumeShader")
-
-        cmds.sets(object_name, e=1, forceElement=shading_group)
-        # cmds.setAttr(f"{shader}.color", 0, 2, 2)
+        roots = self.get_list_widget_items(self.material_list_field)
+        ShaderAssigner(self.get_shader_rules()).assign(roots)
+
+    def get_shader_rules(self):
+        surface = self.surface_checkbox.isChecked()
+        volume = self.volume_checkbox.isChecked()
+
+        rules = []
+        templates = {}
+        for row in range(self.rule_table.rowCount()):
+            pattern, shader_type, name = [(self.rule_table.item(row, column).text().strip()
+                                           if self.rule_table.item(row, column) else "") for column in range(3)]
+            if not pattern:
+                continue
+            shader_type = shader_type or self.material_field.text()
+            name = name or "{name}"
+            # Rows naming the same shader share one template
+            template = templates.get((shader_type, name))
+            if template is None:
+                template = templates[(shader_type, name)] = ShaderTemplate(name, shader_type, surface, volume)
+            rules.append(ShaderRule(pattern, template))
+
+        if not rules:
+            # Without rules every listed root gets a new shader of its own, as the tool always did
+            rules.append(ShaderRule("*", ShaderTemplate("{root}", self.material_field.text(), surface, volume, reuse=False)))
+        return rules
+
+    def add_rule(self):
+        row = self.rule_table.rowCount()
+        self.rule_table.insertRow(row)
+        for column, text in enumerate(("*", self.material_field.text(), "{name}")):
+            self.rule_table.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+
+    def remove_rules(self):
+        rows = sorted({index.row() for index in self.rule_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.rule_table.removeRow(row)
 
     def get_list_widget_items(self, list_widget):
         items = []
@@ -253,50 +1154,133 @@ class VdbImporter(MayaQWidgetDockableMixin, QtWidgets.QWidget):
     def update_VDB_list(self):
         if self.file_edit.text():
             if QtCore.QDir(self.file_edit.text()).exists():
-                files = self.get_files()
-                for file in files:
-                    self.file_list_field.addItem(file)
+                self.cancel_scan()
+                self.scan_worker = VdbScanWorker(self.file_edit.text(), self)
+                self.scan_worker.sequences_found.connect(self.add_sequences)
+                self.scan_worker.progress.connect(self.scan_progress)
+                self.scan_worker.finished.connect(self.scan_finished)
+                self.scan_progress_label.setText("Scanning...")
+                self.scan_cancel_btn.setEnabled(True)
+                self.scan_worker.start()
+
+    def cancel_scan(self):
+        if self.scan_worker and self.scan_worker.isRunning():
+            self.scan_worker.requestInterruption()
+            self.scan_worker.wait()
+
+    def scan_progress(self, directories, sequences):
+        if self.sender() is not self.scan_worker:
+            return
+        self.scan_progress_label.setText(f"{sequences} sequences in {directories} folders")
+
+    def scan_finished(self):
+        worker = self.sender()
+        if worker is not self.scan_worker:
+            return
+        if not worker.completed:
+            self.scan_progress_label.setText(f"{self.scan_progress_label.text()} (cancelled)")
+        self.scan_cancel_btn.setEnabled(False)
+
+    def add_sequences(self, sequences):
+        # Batches a replaced worker queued before it stopped can still arrive, they belong to the old folder
+        if self.sender() is not self.scan_worker:
+            return
+        self.file_list_field.setUpdatesEnabled(False)
+        for sequence in sequences:
+            self.add_sequence(sequence)
+        self.file_list_field.setUpdatesEnabled(True)
+
+    def add_sequence(self, sequence):
+        existing = self.accepted_files.get(sequence.unique_name)
+        if existing:
+            existing.update(sequence)
+            items = self.file_list_field.findItems(sequence.unique_name, QtCore.Qt.MatchExactly)
+            for item in items:
+                item.setToolTip(existing.get_description())
+            return False
+
+        self.accepted_files[sequence.unique_name] = sequence
+        item = QtWidgets.QListWidgetItem(sequence.unique_name)
+        item.setToolTip(sequence.get_description())
+        self.file_list_field.addItem(item)
+        return True
 
     def get_files(self):
-        filepath = self.file_edit.text()
-        files = glob.glob(f"{filepath}/**/*.vdb", recursive=True)
-
         accepted_files = []
-        for file in files:
-            unique_name = file[:-9]
-            unique_name = unique_name.replace("\\", r"/")
-            if unique_name not in self.accepted_files:
-                self.accepted_files.append(unique_name)
-                accepted_files.append(unique_name)
-
+        for sequences in VdbDiscoverer(self.file_edit.text()).scan():
+            for sequence in sequences:
+                if sequence.unique_name not in self.accepted_files:
+                    self.accepted_files[sequence.unique_name] = sequence
+                    accepted_files.append(sequence.unique_name)
         return accepted_files
 
     def create_ai_volume(self):
         selected = self.get_list_widget_items(self.file_list_field)
-
-        for filepath in selected:
-            name = filepath.split("/")
-            obj_name = name[-1]
-
-            files = "/".join(name[:-1])
-            files = glob.glob(f"{files}/*.vdb")[0]
-
-            ai_volume = mtoa.core.createArnoldNode("aiVolume", name=f"{obj_name}_VOL", skipSelect=False)
-            cmds.setAttr(f"{ai_volume}.filename", files, type="string")
-            cmds.setAttr(f"{ai_volume}.useFrameExtension", 1)
-            parent = cmds.listRelatives(ai_volume, parent=True)[0]
-            cmds.rename(parent, obj_name)
-
-            shader = cmds.shadingNode(f"aiStandardVolume", asShader=True, n=f"{obj_name}_MAT")
-            shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True)
-            cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.volumeShader")
-            cmds.sets(obj_name, e=1, forceElement=shading_group)
+        sequences = [self.accepted_files[name] for name in selected if name in self.accepted_files]
+        VdbVolumeBuilder(create_proxies=self.proxy_checkbox.isChecked()).build(sequences)
+
+    def analyze_footprint(self):
+        names = [item.text() for item in self.file_list_field.selectedItems()]
+        if not names:
+            names = self.get_list_widget_items(self.file_list_field)
+
+        self.footprint_tree.setSortingEnabled(False)
+        self.footprint_tree.clear()
+        self.footprints = {}
+        for name in names:
+            sequence = self.accepted_files.get(name)
+            if sequence is None:
+                continue
+            summary = VdbFootprint.analyze(sequence)
+            self.footprints[name] = summary
+            self.add_footprint_item(summary)
+        self.footprint_tree.setSortingEnabled(True)
+        self.footprint_tree.sortItems(5, QtCore.Qt.DescendingOrder)
+
+    def add_footprint_item(self, summary):
+        item = FootprintTreeItem(self.footprint_tree)
+        voxels = summary["voxels_per_frame"]
+        values = [(summary["name"].split("/")[-1], summary["name"]),
+                  (str(summary["frame_count"]), summary["frame_count"]),
+                  (str(len(summary["missing_frames"])), len(summary["missing_frames"])),
+                  (VdbFootprint.format_size(summary["size_avg"]), summary["size_avg"] or 0),
+                  (VdbFootprint.format_size(summary["size_max"]), summary["size_max"] or 0),
+                  (VdbFootprint.format_size(summary["size_total"]), summary["size_total"] or 0),
+                  (f"{voxels:,.0f}" if voxels is not None else "-", voxels or 0)]
+        for column, (text, value) in enumerate(values):
+            item.setText(column, text)
+            item.setData(column, QtCore.Qt.UserRole, value)
+        item.setToolTip(0, summary["name"])
+        if summary["missing_frames"]:
+            item.setToolTip(2, ", ".join(str(frame) for frame in summary["missing_frames"][:50]))
+
+        for grid in summary["grids"]:
+            grid_item = QtWidgets.QTreeWidgetItem(item)
+            grid_item.setText(0, f"{grid['name']} ({grid['type']})")
+            if grid["voxel_count"] is not None:
+                grid_item.setText(6, f"{grid['voxel_count']:,}")
+
+    def export_footprint(self):
+        if not self.footprints:
+            self.analyze_footprint()
+        if not self.footprints:
+            return
+        location = QtWidgets.QFileDialog.getSaveFileName(self, "Export Footprint", "", "JSON (*.json)")[0]
+        if location:
+            VdbFootprint.export(list(self.footprints.values()), location)
+
+    def closeEvent(self, event):
+        self.cancel_scan()
+        super().closeEvent(event)
+
+    def dockCloseEventTriggered(self):
+        self.cancel_scan()
 
     def file_list_remove(self):
         selected = self.file_list_field.selectedItems()
         for each in selected:
             self.file_list_field.takeItem(self.file_list_field.row(each))
-            self.accepted_files.remove(each.text())
+            self.accepted_files.pop(each.text(), None)
 
 
 if __name__ == "__main__":